@@ -1,18 +1,30 @@
+import sys
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
 from xml.dom.minidom import Document
-from xml.etree.ElementTree import fromstring
-from friendly.silverpop.helpers import to_python
-from .constants import ERR_RECIPIENT_ALREADY_EXISTS, ERR_SESSION_EXPIRED_OR_INVALID, \
+from friendly.silverpop.helpers import compile_extractor, LRUCache
+from .constants import ERR_RECIPIENT_ALREADY_EXISTS, ERR_RECIPIENT_IS_NOT_A_MEMBER, ERR_SESSION_EXPIRED_OR_INVALID, \
     LIST_TYPE_CONTACT_LIST, LIST_TYPE_DATABASE, LIST_TYPE_QUERY, LIST_TYPE_SEED_LIST, LIST_TYPE_TEST_LIST, \
     LIST_TYPE_SUPPRESSION_LIST, LIST_TYPE_RELATIONAL_TABLE, CONTACT_CREATED_FROM_DATABASE, CONTACT_CREATED_MANUALLY, \
     CONTACT_CREATED_FROM_TRACKING_DB, CONTACT_CREATED_OPTED_IN, EXPORT_TYPE_ALL, EXPORT_TYPE_OPT_IN, EXPORT_TYPE_OPT_OUT, \
     EXPORT_TYPE_UNDELIVERABLE, EXPORT_FORMAT_CSV, EXPORT_FORMAT_TAB, EXPORT_FORMAT_PIPE, LIST_VISIBILITY_CHOICES, \
-    COLUMN_TYPE_CHOICES, ERR_COLUMN_ALREADY_EXISTS, ERR_CONTACT_LIST_NAME_ALREADY_EXISTS
+    COLUMN_TYPE_CHOICES, ERR_COLUMN_ALREADY_EXISTS, ERR_CONTACT_LIST_NAME_ALREADY_EXISTS, SESSION_TIMEOUT
+from .cache import CatalogCache
+from .catalog import ListCatalog
+from .concurrency import Executor, Future
+from .imports import ListImport
+from .jobs import Job, JobPoller, DEFAULT_POLL_INTERVAL, DEFAULT_MAX_POLL_INTERVAL
+from .envelope import Envelope, EnvelopeTemplate, to_body, to_bytes, gzip_body, is_replayable
+from .parsers import Fault, Result, RowResult, ResponseStream, parse_fault, get_parser, PARSER_AUTO
+from .sessions import SessionPool, SessionKeeper
 from .exceptions import (
-    RecipientAlreadyExistsError, SessionIsExpiredOrInvalidError, EngageError, UnsupportedExportTypeError,
-    UnsupportedExportFormatError, ColumnAlreadyExistsError, ContactListNameAlreadyExists)
+    RecipientAlreadyExistsError, RecipientIsNotAMemberError, SessionIsExpiredOrInvalidError, EngageError,
+    UnsupportedExportTypeError, UnsupportedExportFormatError, ColumnAlreadyExistsError, ContactListNameAlreadyExists)
 from .resources import (
-    Session, List, Column, Table, Contact, Database, Query, RelationalTable)
+    Session, List, Column, Table, Contact, Database, Query, RelationalTable, MetaDataMixin, CompactResource,
+    CompactList, CompactColumn, CompactContact)
 
 
 CONTACT_CREATED_CHOICES = (
@@ -35,9 +47,50 @@ EXPORT_FORMAT_CHOICES = (
     EXPORT_FORMAT_PIPE,
 )
 
+DEFAULT_POOL_CONNECTIONS = 10  # Number of connection pools (one per host) to cache
+DEFAULT_POOL_MAXSIZE = 10  # Maximum number of keep-alive connections per host
+DEFAULT_SESSION_RETRIES = 1  # Number of replays of requests whose session expired
+DEFAULT_SESSION_REFRESH_MARGIN = 120  # Seconds before expiry at which sessions are refreshed
+DEFAULT_CONCURRENCY = 10  # Number of requests ThreadedEngageApi runs at the same time
+
+# Extends lists with the result of ``GetListMetaData``
+extract_meta_data = compile_extractor(
+    str_keys=MetaDataMixin._meta_str_keys,
+    date_keys=MetaDataMixin._meta_date_keys,
+    bool_keys=MetaDataMixin._meta_bool_keys)
+
+
+META_DATA_CACHE_SIZE = 1024  # Number of lists whose meta-data is cached
+RECIPIENT_CACHE_SIZE = 10000  # Number of recipients cached by ``select_recipient_data``
+
+LOGIN_ENVELOPE = EnvelopeTemplate('Login', ('USERNAME', 'PASSWORD'))
+LOGOUT_ENVELOPE = EnvelopeTemplate('Logout')
+GET_LISTS_ENVELOPE = EnvelopeTemplate('GetLists', ('VISIBILITY', 'LIST_TYPE'))
+EXPORT_LIST_ENVELOPE = EnvelopeTemplate('ExportList', ('LIST_ID', 'EXPORT_TYPE', 'EXPORT_FORMAT', 'FILE_ENCODING'))
+LIST_RECIPIENT_MAILINGS_ENVELOPE = EnvelopeTemplate('ListRecipientMailings', ('LIST_ID', 'RECIPIENT_ID'))
+GET_LIST_META_DATA_ENVELOPE = EnvelopeTemplate('GetListMetaData', ('LIST_ID', ))
+GET_JOB_STATUS_ENVELOPE = EnvelopeTemplate('GetJobStatus', ('JOB_ID', ))
+IMPORT_LIST_ENVELOPE = EnvelopeTemplate('ImportList', ('MAP_FILE', 'SOURCE_FILE', 'FILE_ENCODING'))
+CREATE_CONTACT_LIST_ENVELOPE = EnvelopeTemplate('CreateContactList', ('DATABASE_ID', 'CONTACT_LIST_NAME', 'VISIBILITY'))
+
+
+def recipient_key(list_id, email):
+    """Key of a recipient in the recipient cache"""
+    return (str(list_id), unicode(email).lower())
+
+
+def column_emails(columns):
+    """Returns the values of the email column of a ``{name: value}`` dict"""
+    return [value for name, value in columns.iteritems() if name.lower() == 'email' and value]
+
 
 def generate_envelope(action=None):
-    """Generates common XML envelope which is required for all requests."""
+    """Generates common XML envelope which is required for all requests.
+
+    .. note::
+        Kept for compatibility. The API methods serialize their requests with
+        :class:`~.envelope.Envelope` and :class:`~.envelope.EnvelopeTemplate`.
+    """
     doc = Document()
 
     # Create the <Envelope> base element
@@ -121,78 +174,364 @@ def append_list_to(items, target, **kwargs):
 
 
 class EngageApiCore(object):
-    def __init__(self):
+    """Transport and session handling of the Engage API.
+
+    An instance can be shared by several threads: requests return ``Result``
+    objects instead of storing their state on the instance and the session
+    is only replaced while holding a lock.
+    """
+
+    def __init__(self, pool_connections=DEFAULT_POOL_CONNECTIONS, pool_maxsize=DEFAULT_POOL_MAXSIZE,
+                 max_retries=0, timeout=None, compress_requests=False, session_pool_size=None,
+                 session_retries=DEFAULT_SESSION_RETRIES, session_timeout=SESSION_TIMEOUT,
+                 session_refresh_margin=DEFAULT_SESSION_REFRESH_MARGIN, keepalive=False, parser=PARSER_AUTO):
+        """
+        Args:
+            pool_connections (int): Number of connection pools to cache
+            pool_maxsize (int): Maximum number of keep-alive connections per pool. Should be
+                at least the number of workers sharing the client.
+            max_retries (int): Number of retries on failed connections (not on failed requests)
+            timeout (float|tuple): Default ``(connect, read)`` timeout in seconds. ``None`` waits forever.
+            compress_requests (bool): Wether to gzip request bodies
+            session_pool_size (int): Spread requests over up to this many sessions of the account
+                instead of a single one. See :class:`~.sessions.SessionPool`.
+            session_retries (int): How often a request is replayed with a fresh session if its
+                session expired (fault 145)
+            session_timeout (float): Seconds of inactivity after which Engage expires a session
+            session_refresh_margin (float): Sessions which expire within this many seconds are
+                refreshed before they're used or by the keep-alive thread
+            keepalive (bool): Wether to refresh sessions in a background thread. See ``start_keepalive``.
+            parser (str): Backend to parse responses with: ``lxml``, ``stdlib`` or ``auto`` to use
+                lxml if it is installed
+        """
         self._username = None
         self._password = None
         self._engage_url = None
 
         self._session = None  # SilverPop session
+        self._session_lock = threading.RLock()
+        self._local = threading.local()
+
+        # Responses of coalesced requests which are in flight by request body
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+
+        # Pool of additional sessions
+        self._pool = None
+        if session_pool_size:
+            self._pool = SessionPool(self, session_pool_size, max_idle=session_timeout)
+
+        self._timeout = timeout
+        self._session_retries = session_retries
+        self._session_timeout = session_timeout
+        self._session_refresh_margin = session_refresh_margin
+        self._session_listeners = []
+        self._keeper = None
+        self._keepalive = keepalive  # Started once the client is configured completely
+        self._compress_requests = compress_requests
+        self._parser = get_parser(parser)
 
         self._requests = requests.session()  # Requests session
 
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                              max_retries=max_retries)
+        self._requests.mount('https://', adapter)
+        self._requests.mount('http://', adapter)
+
     @property
     def session(self):
         return self._session
 
+    @property
+    def session_pool(self):
+        return self._pool
+
+    @property
+    def parser(self):
+        return self._parser
+
+    @property
+    def error(self):
+        """Fault of the last request made by the current thread"""
+        return getattr(self._local, 'error', None)
+
     def has_errors(self, response, raise_on_error=True):
-        """Determines the state of a request"""
-        tree = fromstring(response.text)
-        success = tree.find('Body/RESULT/SUCCESS').text
+        """Determines the state of a request
+
+        Returns:
+            Result -- Success, parsed tree and fault of the request
+        """
+        # Parse the raw bytes, the XML declaration tells the encoding
+        tree = self._parser.fromstring(response.content)
+        success = self._parser.find(tree, 'Body/RESULT/SUCCESS').text
         was_successful = success.upper() == 'TRUE'
 
         error = None
         if not was_successful:
             # Extract error code and message
-            err_code = tree.find('Body/Fault/FaultCode').text
-            err_msg = tree.find('Body/Fault/FaultString').text
-            err_id = int(tree.find('Body/Fault/detail/error/errorid').text)
-            if raise_on_error:
-                # @todo Improve exceptions
-                if err_id == ERR_RECIPIENT_ALREADY_EXISTS:
-                    raise RecipientAlreadyExistsError(err_msg, err_code)
-                elif err_id == ERR_SESSION_EXPIRED_OR_INVALID:
-                    raise SessionIsExpiredOrInvalidError('%s: %s' % (err_msg, self.session.id))
-                elif err_id == ERR_COLUMN_ALREADY_EXISTS:
-                    raise ColumnAlreadyExistsError(err_msg, err_code)
-                elif err_id == ERR_CONTACT_LIST_NAME_ALREADY_EXISTS:
-                    raise ContactListNameAlreadyExists(err_msg, err_code)
-                else:
-                    raise EngageError(err_msg, err_code)
-            error = (err_code, err_msg)
+            error = parse_fault(self._parser.find(tree, 'Body/Fault'))
+
+        result = Result(was_successful, tree, error)
+        if raise_on_error and not was_successful:
+            self.raise_for_result(result)
 
-        return (was_successful, tree, error)
+        return result
+
+    def parse_stream(self, response, raise_on_error=True):
+        """Determines the state of a request whose response is parsed incrementally
+
+        Returns:
+            ResponseStream -- Stream yielding the children of ``RESULT``
+        """
+        raw = response.raw
+        if hasattr(raw, 'decode_content'):
+            raw.decode_content = True  # Let urllib3 decompress gzipped responses
+
+        result = ResponseStream(raw, response, iterparse=self._parser.iterparse)
+        if raise_on_error and not result.success:
+            self.raise_for_result(result)
+
+        return result
+
+    def raise_for_result(self, result):
+        """Raises the ``EngageError`` matching the fault of a failed request"""
+        err_code, err_msg, err_id = result.error
+
+        # @todo Improve exceptions
+        if err_id == ERR_RECIPIENT_ALREADY_EXISTS:
+            raise RecipientAlreadyExistsError(err_msg, err_code)
+        elif err_id == ERR_RECIPIENT_IS_NOT_A_MEMBER:
+            raise RecipientIsNotAMemberError(err_msg, err_code)
+        elif err_id == ERR_SESSION_EXPIRED_OR_INVALID:
+            raise SessionIsExpiredOrInvalidError('%s: %s' % (err_msg, getattr(self.session, 'id', None)))
+        elif err_id == ERR_COLUMN_ALREADY_EXISTS:
+            raise ColumnAlreadyExistsError(err_msg, err_code)
+        elif err_id == ERR_CONTACT_LIST_NAME_ALREADY_EXISTS:
+            raise ContactListNameAlreadyExists(err_msg, err_code)
+        else:
+            raise EngageError(err_msg, err_code)
 
     def acquire_session(self):
         """Acquires a silverpop session"""
-        if not self.session:
-            self.login()
+        session = self.session
+        if session:
+            # Replace sessions which Engage has expired already instead of wasting a request
+            if session.expires_in(self._session_timeout) <= 0:
+                self.renew_session(session)
+            return
+
+        with self._session_lock:
+            # Another thread may have logged in while we were waiting
             if not self.session:
-                raise EngageError('No Session')
+                self.login()
+                if not self.session:
+                    raise EngageError('No Session')
 
-    def _request(self, doc, session_required=True):
+    def _request(self, doc, session_required=True, timeout=None, session=None, stream=False):
         """Wraps the whole request mechanism"""
-        if session_required:
+        if session is None and session_required:
             self.acquire_session()
 
-        data = doc.toxml(encoding='utf-8')
+        data = to_body(doc)
         headers = {
             'Content-Type': 'text/xml;charset=UTF-8',
+            'Accept-Encoding': 'gzip, deflate',
         }
 
+        if self._compress_requests:
+            data = gzip_body(data)
+            headers['Content-Encoding'] = 'gzip'
+
+        if timeout is None:
+            timeout = self._timeout
+
         url = self._engage_url
 
         # Append jsessionid to URL if we have a session
-        if self._session is not None:
-            url += ';jsessionid=%s' % str(self._session)
+        if session is None:
+            session = self._session
+        if session is not None:
+            url += ';jsessionid=%s' % str(session)
 
-        response = self._requests.get(url, data=data, headers=headers)
+        response = self._requests.post(url, data=data, headers=headers, timeout=timeout, stream=stream)
         response.raise_for_status()
 
+        if session is not None:
+            session.touch()
+
         return response
 
-    def get(self, doc, session_required=True, raise_on_error=True):
-        response = self._request(doc, session_required)
-        return self.has_errors(response, raise_on_error)
+    def get(self, doc, session_required=True, raise_on_error=True, timeout=None, session=None, coalesce=False,
+            stream=False):
+        """Sends a request and determines its state.
+
+        Args:
+            doc: Envelope to send
+            session_required (bool): Wether to log in before sending the request
+            raise_on_error (bool): Wether to raise an ``EngageError`` on faults
+            timeout (float|tuple): ``(connect, read)`` timeout of this call. Overrides the default timeout.
+            session (Session): Session to use instead of the client's one or one leased from the pool
+            coalesce (bool): Wether to share the response with identical requests which are in flight
+                already. Only meant for requests which don't change anything.
+            stream (bool): Wether to parse the response incrementally. Returns a ``ResponseStream``
+                instead of a ``Result`` then.
+        """
+        self._local.error = None
+
+        if coalesce and not stream and session is None and is_replayable(doc):
+            return self._get_coalesced(to_bytes(doc), session_required, raise_on_error, timeout)
+
+        # Requests with a session of their own or a body which can't be sent twice aren't replayed
+        retries = 0
+        if session is None and session_required and is_replayable(doc):
+            retries = self._session_retries
+
+        while True:
+            result, used_session = self._send(doc, session_required, timeout, session, stream)
+            if result.error_id != ERR_SESSION_EXPIRED_OR_INVALID or retries <= 0:
+                break
+            retries -= 1
+
+            # Pooled sessions have been discarded already
+            if self._pool is None:
+                self.renew_session(used_session)
+
+        self._local.error = result.error
+
+        if raise_on_error and not result.success:
+            self.raise_for_result(result)
+
+        return result
+
+    def _get_coalesced(self, data, session_required, raise_on_error, timeout):
+        """Sends a request unless an identical one is in flight and waits for the shared response"""
+        with self._inflight_lock:
+            future = self._inflight.get(data)
+            leader = future is None
+            if leader:
+                future = self._inflight[data] = Future()
+
+        if leader:
+            try:
+                future.set_result(self.get(data, session_required, raise_on_error=False, timeout=timeout))
+            except BaseException:
+                future.set_exception(sys.exc_info())
+            finally:
+                with self._inflight_lock:
+                    del self._inflight[data]
+
+        result = future.result()
+        self._local.error = result.error
+
+        if raise_on_error and not result.success:
+            self.raise_for_result(result)
+
+        return result
+
+    def _send(self, doc, session_required, timeout, session, stream=False):
+        """Sends a request once and returns its result along with the session it used"""
+        parse = self.parse_stream if stream else self.has_errors
+
+        if session is None and session_required and self._pool is not None:
+            with self._pool.lease() as session:
+                result = parse(self._request(doc, session_required, timeout, session, stream),
+                               raise_on_error=False)
+                if result.error_id == ERR_SESSION_EXPIRED_OR_INVALID:
+                    self._pool.discard(session)
+            return result, session
+
+        if session is None and session_required:
+            self.acquire_session()
+            session = self._session
+
+        response = self._request(doc, session_required, timeout, session, stream)
+        return parse(response, raise_on_error=False), session
+
+    def renew_session(self, expired, logout=False):
+        """Replaces an expired session with a fresh one.
+
+        Threads which notice the same expired session at once log in only
+        once: the others wait and then use the session logged in by the first.
+
+        Args:
+            expired (Session): Session to replace
+            logout (bool): Wether to log out the replaced session, e.g. if it's still valid
+        """
+        renewed = False
+        with self._session_lock:
+            if self._session is expired or self._session is None:
+                self._session = None
+                self.login()
+                if not self._session:
+                    raise EngageError('No Session')
+                renewed = True
+            session = self._session
+
+        if expired is not None and not expired.closed:
+            if logout:
+                self.close_session(expired)
+            else:
+                expired.close()
+
+        if renewed:
+            for listener in self._session_listeners:
+                listener(expired, session)
+
+    def add_session_listener(self, listener):
+        """Registers ``listener(old_session, new_session)`` which is called whenever the session is renewed"""
+        self._session_listeners.append(listener)
+
+    def ensure_session(self, min_ttl=None):
+        """Makes sure the session stays valid for at least ``min_ttl`` seconds.
+
+        Call it ahead of latency-sensitive requests so they never wait for a login.
+
+        Args:
+            min_ttl (float): Seconds the session has to stay valid. Defaults to the refresh margin.
+
+        Returns:
+            Session -- The current session
+        """
+        if min_ttl is None:
+            min_ttl = self._session_refresh_margin
+
+        self.acquire_session()
+        session = self._session
+        if session.expires_in(self._session_timeout) <= min_ttl:
+            self.renew_session(session, logout=True)
+        return self._session
+
+    def refresh_sessions(self, min_ttl=None):
+        """Refreshes the client's session and idle pooled sessions which expire within ``min_ttl`` seconds"""
+        if min_ttl is None:
+            min_ttl = self._session_refresh_margin
+
+        session = self._session
+        if session is not None and session.expires_in(self._session_timeout) <= min_ttl:
+            self.renew_session(session, logout=True)
+
+        if self._pool is not None:
+            self._pool.refresh(lambda s: s.expires_in(self._session_timeout) <= min_ttl)
+
+    def start_keepalive(self, interval=None):
+        """Starts a background thread which refreshes sessions before Engage expires them.
+
+        Args:
+            interval (float): Seconds between checks. Defaults to half the refresh margin.
+        """
+        if self._keeper is not None:
+            return
+
+        if interval is None:
+            interval = self._session_refresh_margin / 2.0
+
+        self._keeper = SessionKeeper(self, interval)
+        self._keeper.start()
+
+    def stop_keepalive(self):
+        if self._keeper is not None:
+            self._keeper.stop()
+            self._keeper = None
 
     def login(self, username=None, password=None):
         """Logs in to Engage's API.
@@ -204,40 +543,268 @@ class EngageApiCore(object):
         Returns:
             bool -- Wether the login was successful for not
         """
+        session = self.create_session(username, password)
+        if session is not None:
+            with self._session_lock:
+                self._session = session
+
+        return session is not None
+
+    def create_session(self, username=None, password=None):
+        """Logs in a new session without making it the client's session.
+
+        Returns:
+            Session -- The new session or ``None`` if the login failed
+        """
         if not username:
             username = self._username
 
         if not password:
             password = self._password
 
-        body_node, doc = generate_envelope('Login')
-        append_text_node_to('USERNAME', username, body_node)
-        append_text_node_to('PASSWORD', password, body_node)
+        doc = LOGIN_ENVELOPE.render(username, password)
 
-        (success, tree, self.error) = self.get(doc, False)
+        (success, tree, error) = self.get(doc, False)
         if success:
-            session_id = tree.find("Body/RESULT/SESSIONID").text
-            self._session = Session(session_id)
+            return Session(self._parser.find(tree, 'Body/RESULT/SESSIONID').text)
 
+        return None
+
+    def close_session(self, session):
+        """Logs out a session created by ``create_session``
+
+        Returns:
+            bool -- Wether the logout was successful or not
+        """
+        (success, tree, error) = self.get(LOGOUT_ENVELOPE.render(), raise_on_error=False, session=session)
+        session.close()
         return success
 
+    def close(self):
+        """Stops the keep-alive thread and logs out all sessions of the session pool"""
+        self.stop_keepalive()
+
+        if self._pool is not None:
+            self._pool.close()
+
     def logout(self):
         """Logs out from Engage's API and removes the session"""
-        body_node, doc = generate_envelope('Logout')
-        (success, tree, self.error) = self.get(doc)
+        self.acquire_session()
+        session = self._session
+
+        doc = LOGOUT_ENVELOPE.render()
+        (success, tree, error) = self.get(doc, session=session)
         if success:
-            self._session = None
+            with self._session_lock:
+                if self._session is session:
+                    self._session = None
 
         return success
 
 
 class EngageApi(EngageApiCore):
-    def __init__(self, username, password, url, **kwargs):
-        super(EngageApi, self).__init__()
+    """Engage client which hydrates the responses into resources.
+
+    Args:
+        compact (bool): Wether to hydrate slotted resources (``CompactList``, ``CompactColumn``,
+            ``CompactContact``) which need considerably less memory. Use them when holding
+            many lists or contacts at once.
+        meta_data_ttl (float): Seconds the result of ``get_list_meta_data`` is cached per list.
+            ``None`` or ``0`` disables the cache. Schema changes made by other clients are
+            noticed once the cached result expires.
+        catalog_ttl (float): Serve ``get_lists`` and its wrappers from a ``CatalogCache`` which is
+            refreshed in the background after this many seconds. ``None`` fetches the lists every time.
+        catalog_max_stale (float): Seconds after which cached catalogs are refreshed before they're served
+        store (SQLiteStore): Persists the cached catalogs and meta-data, so new processes start with
+            them instead of fetching them again. Stored entries are revalidated lazily: catalogs are
+            refreshed in the background and stored meta-data is used once per process, as long as
+            it's younger than ``meta_data_ttl``. Without ``catalog_ttl`` and ``meta_data_ttl`` the
+            store isn't used for catalogs and meta-data respectively.
+        recipient_ttl (float): Seconds the contacts returned by ``select_recipient_data`` are cached
+            by ``(list_id, email)``. ``None`` disables the cache. Cached contacts are shared, treat
+            them as read-only.
+        recipient_negative_ttl (float): Seconds addresses which aren't members of a list are
+            remembered. ``None`` doesn't remember them.
+        job_poll_interval (float): Seconds until the status of a job is polled first by ``Job.wait``.
+            The interval doubles after each poll.
+        job_max_poll_interval (float): Maximum number of seconds between two polls of a job
+    """
+
+    def __init__(self, username, password, url, compact=False, meta_data_ttl=None,
+                 catalog_ttl=None, catalog_max_stale=None, store=None, recipient_ttl=None,
+                 recipient_negative_ttl=None, job_poll_interval=DEFAULT_POLL_INTERVAL,
+                 job_max_poll_interval=DEFAULT_MAX_POLL_INTERVAL, **kwargs):
+        super(EngageApi, self).__init__(**kwargs)
         self._username = username
         self._password = password
         self._engage_url = url
 
+        self.compact = compact
+        self._list_class = CompactList if compact else List
+        self._column_class = CompactColumn if compact else Column
+        self._contact_class = CompactContact if compact else Contact
+
+        # Serialized RESULT element of ``GetListMetaData`` by list id
+        self._meta_data = LRUCache(META_DATA_CACHE_SIZE, ttl=meta_data_ttl) if meta_data_ttl else None
+
+        self._store = store
+        self._restored = set()  # Lists whose stored meta-data has been used already
+
+        # Contacts and faults of addresses which aren't members by (list_id, email)
+        self._recipients = LRUCache(RECIPIENT_CACHE_SIZE, ttl=recipient_ttl) if recipient_ttl else None
+        self._missing_recipients = None
+        self._recipient_generation = 0  # Incremented whenever recipients are changed
+        self._recipient_lists = {}  # Ids of the lists with cached lookups by address
+        self._recipient_lock = threading.Lock()
+        if recipient_negative_ttl:
+            self._missing_recipients = LRUCache(RECIPIENT_CACHE_SIZE, ttl=recipient_negative_ttl)
+
+        self._catalogs = None
+        if catalog_ttl is not None:
+            self._catalogs = CatalogCache(self, catalog_ttl, max_stale=catalog_max_stale, store=store)
+            self._catalogs.add_listener(self._on_catalog_refreshed)
+
+        self._job_poll_interval = job_poll_interval
+        self._job_max_poll_interval = job_max_poll_interval
+        self._job_poller = None
+        self._job_poller_lock = threading.Lock()
+
+        if self._keepalive:
+            self.start_keepalive()
+
+    @property
+    def catalog_cache(self):
+        return self._catalogs
+
+    @property
+    def job_poller(self):
+        """``JobPoller`` shared by the jobs of the client. Started when it's used first."""
+        if self._job_poller is None:
+            with self._job_poller_lock:
+                if self._job_poller is None:
+                    poller = JobPoller(self._job_poll_interval, self._job_max_poll_interval)
+                    poller.start()
+                    self._job_poller = poller
+        return self._job_poller
+
+    def _on_catalog_refreshed(self, key, changed_ids, removed_ids):
+        # Lists modified since the last refresh may have a new schema
+        for list_id in changed_ids + removed_ids:
+            self.invalidate_meta_data(list_id)
+
+    def close(self):
+        """Stops the background threads and logs out all sessions of the session pool"""
+        if self._catalogs is not None:
+            self._catalogs.close()
+
+        if self._job_poller is not None:
+            self._job_poller.stop()
+
+        super(EngageApi, self).close()
+
+    @property
+    def meta_data_cache(self):
+        """Cache of the meta-data of lists, which counts its ``hits`` and ``misses``"""
+        return self._meta_data
+
+    @property
+    def recipient_cache(self):
+        return self._recipients
+
+    def invalidate_recipient(self, list_id=None, email=None):
+        """Drops the cached lookups of an address (all cached lookups if ``email`` is omitted).
+
+        The lookups are dropped for all lists, not just ``list_id``: a change of
+        a database shows through its queries and contact lists.
+        """
+        caches = [cache for cache in (self._recipients, self._missing_recipients) if cache is not None]
+
+        with self._recipient_lock:
+            self._recipient_generation += 1
+
+            if email is None:
+                self._recipient_lists.clear()
+                for cache in caches:
+                    cache.clear()
+                return
+
+            (unused, address) = recipient_key(list_id, email)
+            for cached_list_id in self._recipient_lists.pop(address, ()):
+                for cache in caches:
+                    cache.delete((cached_list_id, address))
+
+    def _cache_recipient(self, cache, key, value, generation):
+        """Caches the result of a lookup unless recipients were changed while it was in flight"""
+        with self._recipient_lock:
+            if generation != self._recipient_generation:
+                return
+
+            cache.set(key, value)
+            self._recipient_lists.setdefault(key[1], set()).add(key[0])
+
+            if len(self._recipient_lists) > 2 * RECIPIENT_CACHE_SIZE:
+                # Forget the addresses whose lookups have been evicted
+                self._recipient_lists = {}
+                for cache in (self._recipients, self._missing_recipients):
+                    if cache is not None:
+                        for (list_id, address) in cache.keys():
+                            self._recipient_lists.setdefault(address, set()).add(list_id)
+
+    def _change_recipients(self, doc, list_ids, emails, raise_on_error=True):
+        """Sends a request which changes recipients and drops them from the recipient cache afterwards.
+
+        Args:
+            list_ids (list): Lists the recipients are changed at. ``None`` if they're unknown.
+            emails (list): Addresses of the changed recipients. Empty if they're unknown.
+        """
+        try:
+            return self.get(doc, raise_on_error=raise_on_error)
+        finally:
+            if self._recipients is not None or self._missing_recipients is not None:
+                if list_ids is None or not emails:
+                    self.invalidate_recipient()
+                else:
+                    for email in emails:
+                        self.invalidate_recipient(email=email)
+
+    def invalidate_meta_data(self, list_id=None):
+        """Drops the cached (and stored) meta-data of a list (of all lists by default)"""
+        if self._store is not None:
+            self._store.delete_meta_data(list_id)
+
+        if self._meta_data is None:
+            return
+
+        if list_id is None:
+            self._meta_data.clear()
+        else:
+            self._meta_data.delete(str(list_id))
+
+    def _restore_meta_data(self, list_id):
+        """Returns the stored ``(RESULT element as bytes, fetched_at)`` of a list.
+
+        Entries which have been used before or are older than ``meta_data_ttl`` are ignored.
+        """
+        if self._store is None or list_id in self._restored:
+            return None
+
+        self._restored.add(list_id)
+        stored = self._store.load_meta_data(list_id)
+        if stored is None:
+            return None
+
+        (data, fetched_at) = stored
+        if time.time() - fetched_at >= self._meta_data.ttl:
+            return None
+
+        try:
+            self._build_table(self._parser.fromstring(data))
+        except Exception:
+            # Unparsable or written by an incompatible version, it's fetched again
+            self._store.delete_meta_data(list_id)
+            return None
+        return (data, fetched_at)
+
     def get_lists(self, visibility, list_type):
         """Fetches lists.
 
@@ -248,21 +815,65 @@ class EngageApi(EngageApiCore):
         Returns:
             list -- List of lists. Whereby the type depends on the list_type you requested.
         """
-        body_node, doc = generate_envelope('GetLists')
-        append_text_node_to('VISIBILITY', str(visibility), body_node)
-        append_text_node_to('LIST_TYPE', str(list_type), body_node)
+        if self._catalogs is not None:
+            return [item for item in self._catalogs.get(visibility, list_type)]
 
-        (success, tree, self.error) = self.get(doc)
+        doc = GET_LISTS_ENVELOPE.render(str(visibility), str(list_type))
+
+        (success, tree, error) = self.get(doc, coalesce=True)
 
         lists = []
         if success:
-            for el in tree.findall('Body/RESULT/LIST'):
-                list = List.from_element(el, self)
+            for el in self._parser.findall(tree, 'Body/RESULT/LIST'):
+                list = self._list_class.from_element(el, self)
                 lists.append(list)
         return lists
 
+    def iter_lists(self, visibility, list_type):
+        """Fetches lists one by one while the response is still arriving.
+
+        Unlike ``get_lists`` the response is never held in memory as a whole:
+        each ``LIST`` element is hydrated as soon as it has been parsed and
+        cleared afterwards. The lists' ``in_el`` is ``None``.
+
+        Args:
+            visibility (int): Visibility of the lists you want to fetch.
+            list_type (int): Type of lists you want to fetch
+
+        Returns:
+            generator -- Lists whereby the type depends on the list_type you requested.
+        """
+        doc = GET_LISTS_ENVELOPE.render(str(visibility), str(list_type))
+
+        stream = self.get(doc, stream=True)
+        for el in stream.iterfind('LIST'):
+            # The element is cleared once the next one is parsed, so the lists don't keep it
+            yield self._list_class.from_element(el, self, keep_element=False)
+
+    def get_catalog(self, visibility, list_type):
+        """Fetches lists into a ``ListCatalog``.
+
+        The response is parsed incrementally like ``iter_lists`` does, but the
+        lists are stored column-wise and can be looked up by id, name or folder.
+
+        Args:
+            visibility (int): Visibility of the lists you want to fetch.
+            list_type (int): Type of lists you want to fetch
+
+        Returns:
+            ListCatalog -- Catalog of the lists
+        """
+        doc = GET_LISTS_ENVELOPE.render(str(visibility), str(list_type))
+
+        stream = self.get(doc, stream=True)
+        return ListCatalog.from_elements(stream.iterfind('LIST'), self)
+
     def export_list(self, database, export_type, export_format, **kwargs):
-        """Exports a database"""
+        """Exports a database
+
+        Returns:
+            Job -- Handle of the export job. Its ``file_path`` is the path of the file on the FTP server.
+        """
         list_id = database
         if isinstance(database, Database):
             list_id = database.id
@@ -299,18 +910,70 @@ class EngageApi(EngageApiCore):
 
         file_encoding = kwargs.get('file_encoding', 'utf-8')
 
-        body_node, doc = generate_envelope('ExportList')
-        append_text_node_to('LIST_ID', str(list_id), body_node)
-        append_text_node_to('EXPORT_TYPE', export_type, body_node)
-        append_text_node_to('EXPORT_FORMAT', export_format, body_node)
-        append_text_node_to('FILE_ENCODING', file_encoding, body_node)
+        doc = EXPORT_LIST_ENVELOPE.render(str(list_id), export_type, export_format, file_encoding)
+
+        (success, tree, error) = self.get(doc)
+
+        job_id = self._parser.find(tree, 'Body/RESULT/JOB_ID').text
+        file_path = self._parser.find(tree, 'Body/RESULT/FILE_PATH').text
+
+        return Job(self, job_id, file_path=file_path)
+
+    def get_job_status(self, job_id):
+        """Fetches the status of a background job
+
+        Returns:
+            tuple -- ``JOB_STATUS_*`` and the description of the job
+
+        Raises:
+            EngageError -- If the response has no status
+        """
+        doc = GET_JOB_STATUS_ENVELOPE.render(str(job_id))
+
+        (success, tree, error) = self.get(doc)
+
+        status = self._parser.find(tree, 'Body/RESULT/JOB_STATUS')
+        if status is None:
+            raise EngageError('Response without JOB_STATUS')
+
+        description = self._parser.find(tree, 'Body/RESULT/JOB_DESCRIPTION')
+        return (status.text, description.text if description is not None else None)
+
+    def start_import(self, map_file, source_file, file_encoding='utf-8'):
+        """Starts an ``ImportList`` job of files which have been uploaded already
+
+        Returns:
+            Job -- Handle of the import job
+        """
+        doc = IMPORT_LIST_ENVELOPE.render(map_file, source_file, file_encoding)
+
+        (success, tree, error) = self.get(doc)
+
+        return Job(self, self._parser.find(tree, 'Body/RESULT/JOB_ID').text,
+                   map_file=map_file, source_file=source_file)
+
+    def import_list(self, database, rows, transfer, columns=None, **kwargs):
+        """Imports rows into a database with an ``ImportList`` job.
+
+        The rows are streamed into a CSV file which is uploaded along with a
+        mapping file generated from the database's meta-data. See ``ListImport``.
 
-        (success, tree, self.error) = self.get(doc)
+        Args:
+            database (Database): Database to import into
+            rows (iterable): Dicts mapping column ids or names to values
+            transfer (FileTransfer): Backend the files are uploaded with
+            columns (list): Ids or names of the columns to import. The keys of the first row by default.
+            kwargs: ``action``, ``sync_fields`` and ``name`` of ``ListImport``
 
-        job_id = tree.find('Body/RESULT/JOB_ID').text
-        file_path = tree.find('Body/RESULT/FILE_PATH').text
+        Returns:
+            Job -- Handle of the import job
+        """
+        if not isinstance(database, Database):
+            list_id, database = database, Database()
+            database.id = list_id
+            database.api = self
 
-        return (success, job_id, file_path)
+        return ListImport(self, database, transfer, **kwargs).run(rows, columns)
 
     def add_list_column(self, database, column_name, column_type, default_value, **kwargs):
         database_id = database
@@ -320,19 +983,21 @@ class EngageApi(EngageApiCore):
         if column_type not in COLUMN_TYPE_CHOICES:
             raise ValueError('Unknown column-type: %r' % column_type)
 
-        body_node, doc = generate_envelope('AddListColumn')
-        append_text_node_to('LIST_ID', str(database_id), body_node)
-        append_text_node_to('COLUMN_NAME', column_name, body_node)
-        append_text_node_to('COLUMN_TYPE', str(column_type), body_node)
-        append_text_node_to('DEFAULT', default_value, body_node)
+        doc = Envelope('AddListColumn')
+        doc.append_text('LIST_ID', str(database_id))
+        doc.append_text('COLUMN_NAME', column_name)
+        doc.append_text('COLUMN_TYPE', str(column_type))
+        doc.append_text('DEFAULT', default_value)
 
         selection_values = kwargs.get('selection_values', [])
         assert isinstance(selection_values, list)
-        append_list_to(selection_values, body_node,
-                       container_node_name='SELECTION_VALUES',
-                       item_node_name='VALUE')
+        doc.append_list(selection_values,
+                        container_node_name='SELECTION_VALUES',
+                        item_node_name='VALUE')
 
-        (success, tree, self.error) = self.get(doc)
+        (success, tree, error) = self.get(doc)
+        if success:
+            self.invalidate_meta_data(database_id)
 
         return success
 
@@ -358,25 +1023,38 @@ class EngageApi(EngageApiCore):
         return self.get_lists(visibility, LIST_TYPE_RELATIONAL_TABLE)
 
     def get_recipient_mailings(self, list, recipient):
+        """Fetches the mailings a recipient of a list was sent.
+
+        Args:
+            list (Database|Query): List of the recipient
+            recipient (Contact): Recipient you want to fetch the mailings for
+
+        Returns:
+            list -- Dicts mapping the lower-cased tags of each ``MAILING`` (``mailing_id``,
+            ``sent_ts``, ...) to their text
+        """
         if not isinstance(list, Database) and not isinstance(list, Query):
             raise Exception('Invalid list')
 
         if not isinstance(recipient, Contact):
             raise Exception('Invalid recipient')
 
-        body_node, doc = generate_envelope('ListRecipientMailings')
-        append_text_node_to('LIST_ID', str(list.id), body_node)
-        append_text_node_to('RECIPIENT_ID', str(recipient.id), body_node)
+        doc = LIST_RECIPIENT_MAILINGS_ENVELOPE.render(str(list.id), str(recipient.id))
 
-        (success, tree, self.error) = self.get(doc)
+        (success, tree, error) = self.get(doc)
 
-        print success, self.error
+        return [dict((child.tag.lower(), child.text) for child in mailing)
+                for mailing in self._parser.findall(tree, 'Body/RESULT/MAILING')]
 
-    def get_list_meta_data(self, entity):
+    def get_list_meta_data(self, entity, refresh=False):
         """Fetches meta-data and updates the list with 'em.
 
+        The meta-data is cached per list for ``meta_data_ttl`` seconds. Each
+        list gets its own ``Table`` built from the cached result.
+
         Args:
             entity (List|Database): List you want to fetch the meta-data for.
+            refresh (bool): Wether to bypass the cache
 
         Returns:
             bool -- Tells you wether the operation was successful or not
@@ -387,61 +1065,84 @@ class EngageApi(EngageApiCore):
         if not isinstance(entity, Database) and not isinstance(entity, Query) and not isinstance(entity, RelationalTable):
             raise ValueError('Invalid entity')
 
-        body_node, doc = generate_envelope('GetListMetaData')
-        append_text_node_to('LIST_ID', str(entity.id), body_node)
+        list_id = str(entity.id)
+        result_node = None
+        if self._meta_data is not None and not refresh:
+            data = self._meta_data.get(list_id)
+            if data is None:
+                restored = self._restore_meta_data(list_id)
+                if restored is not None:
+                    # Keeps its age, so it expires like it would have in the process which fetched it
+                    (data, fetched_at) = restored
+                    self._meta_data.set(list_id, data, created_at=fetched_at)
+            if data is not None:
+                result_node = self._parser.fromstring(data)
+
+        if result_node is None:
+            doc = GET_LIST_META_DATA_ENVELOPE.render(list_id)
+
+            (success, tree, error) = self.get(doc, coalesce=True)
+            if not success:
+                return success
+
+            result_node = self._parser.find(tree, 'Body/RESULT')
+            if self._meta_data is not None:
+                data = self._parser.tostring(result_node)
+                self._meta_data.set(list_id, data)
+                if self._store is not None:
+                    self._store.save_meta_data(list_id, data)
+
+        table = self._build_table(result_node)
+        if isinstance(entity, CompactResource):
+            # Compact resources don't keep their elements
+            extract_meta_data(entity, result_node, _table=table)
+        else:
+            extract_meta_data(entity, result_node, in_el=result_node, _table=table)
+        return True
 
-        (success, tree, self.error) = self.get(doc)
-        if success:
-            result_node = tree.find('Body/RESULT')
-
-            table = Table()
-
-            for item in result_node.findall('KEY_COLUMNS/COLUMN'):
-                # @todo: DRY
-                column_name = item.find('NAME').text
-                column_type = getattr(item.find('TYPE'), 'text', None)
-                default_value = getattr(item.find('DEFAULT_VALUE'), 'text', None)
-
-                table.add_column(Column(column_name, column_type, default_value, is_key=True))
-
-            # NOTE: ``COLUMNS`` contains also ``KEY_COLUMNS``
-            for item in result_node.findall('COLUMNS/COLUMN'):
-                # @todo: DRY
-                column_name = item.find('NAME').text
-                column_type = getattr(item.find('TYPE'), 'text', None)
-                default_value = getattr(item.find('DEFAULT_VALUE'), 'text', None)
-
-                # @todo Add support for selection values
-                #                for selection_value in item.find('SELECTION_VALUES/VALUE'):
-                #                    pass
-
-                table.add_column(Column(column_name, column_type, default_value))
-
-            to_python(
-                entity,
-                in_el=result_node,
-                str_keys=('ORGANIZATION_ID', ),
-                date_keys=('LAST_CONFIGURED', 'CREATED'),
-                bool_keys=('OPT_IN_FORM_DEFINED', 'OPT_OUT_FORM_DEFINED', 'PROFILE_FORM_DEFINED',
-                           'OPT_IN_AUTOREPLY_DEFINED', 'PROFILE_AUTOREPLY_DEFINED'),
-                _table=table)
-        return success
+    def _build_table(self, result_node):
+        """Builds the ``Table`` of the columns of a ``GetListMetaData`` result"""
+        table = Table()
+
+        for item in self._parser.findall(result_node, 'KEY_COLUMNS/COLUMN'):
+            # @todo: DRY
+            column_name = item.find('NAME').text
+            column_type = getattr(item.find('TYPE'), 'text', None)
+            default_value = getattr(item.find('DEFAULT_VALUE'), 'text', None)
+
+            table.add_column(self._column_class(column_name, column_type, default_value, is_key=True))
+
+        # NOTE: ``COLUMNS`` contains also ``KEY_COLUMNS``
+        for item in self._parser.findall(result_node, 'COLUMNS/COLUMN'):
+            # @todo: DRY
+            column_name = item.find('NAME').text
+            column_type = getattr(item.find('TYPE'), 'text', None)
+            default_value = getattr(item.find('DEFAULT_VALUE'), 'text', None)
+
+            # @todo Add support for selection values
+            #                for selection_value in item.find('SELECTION_VALUES/VALUE'):
+            #                    pass
+
+            table.add_column(self._column_class(column_name, column_type, default_value))
+
+        return table
 
     def remove_recipient(self, list_id, email=None, columns={}):
         if email is None and not columns:
             raise Exception('You need to define an email or columns')
 
-        body_node, doc = generate_envelope('RemoveRecipient')
-        append_text_node_to('LIST_ID', str(list_id), body_node)
+        doc = Envelope('RemoveRecipient')
+        doc.append_text('LIST_ID', str(list_id))
 
         if email is not None:
-            append_text_node_to('EMAIL', email, body_node)
+            doc.append_text('EMAIL', email)
         elif columns:
-            append_columns_to(columns, body_node)
+            doc.append_columns(columns)
         else:
             pass
 
-        (success, tree, self.error) = self.get(doc)
+        emails = [email] if email is not None else column_emails(columns)
+        (success, tree, error) = self._change_recipients(doc, [list_id], emails)
 
         return success
 
@@ -456,10 +1157,44 @@ class EngageApi(EngageApiCore):
         raise NotImplementedError()
 
     def insert_update_table(self, table_id, rows):
-        raise NotImplementedError()
+        """Inserts or updates rows of a Relational Table.
+
+        Args:
+            table_id (int): Id of the table
+            rows (iterable): Dicts mapping column names to values. Rows which aren't given as
+                a list or tuple are consumed lazily while the request is streamed to Engage.
+
+        Returns:
+            bool -- Wether the operation was successful or not
+        """
+        # Rows given as an iterator are streamed to Engage, lists can be replayed after a re-login
+        doc = Envelope('InsertUpdateRelationalTable', stream=not isinstance(rows, (list, tuple)))
+        doc.append_text('TABLE_ID', str(table_id))
+        doc.append_rows(rows)
+
+        (success, tree, error) = self.get(doc)
+
+        return success
 
     def delete_table_data(self, table_id, rows):
-        raise NotImplementedError()
+        """Deletes rows of a Relational Table.
+
+        Args:
+            table_id (int): Id of the table
+            rows (iterable): Dicts mapping key column names to values. Consumed lazily like
+                in ``insert_update_table``.
+
+        Returns:
+            bool -- Wether the operation was successful or not
+        """
+        # Rows given as an iterator are streamed to Engage, lists can be replayed after a re-login
+        doc = Envelope('DeleteRelationalTableData', stream=not isinstance(rows, (list, tuple)))
+        doc.append_text('TABLE_ID', str(table_id))
+        doc.append_rows(rows, column_node_name='KEY_COLUMN')
+
+        (success, tree, error) = self.get(doc)
+
+        return success
 
     def import_table(self, map_file, source_file):
         raise NotImplementedError()
@@ -496,12 +1231,9 @@ class EngageApi(EngageApiCore):
         if visibility not in LIST_VISIBILITY_CHOICES:
             raise ValueError('Unknown list visibility: %r' % visibility)
 
-        body_node, doc = generate_envelope('CreateContactList')
-        append_text_node_to('DATABASE_ID', str(database_id), body_node)
-        append_text_node_to('CONTACT_LIST_NAME', list_name, body_node)
-        append_text_node_to('VISIBILITY', str(visibility), body_node)
+        doc = CREATE_CONTACT_LIST_ENVELOPE.render(str(database_id), list_name, str(visibility))
 
-        (success, tree, self.error) = self.get(doc)
+        (success, tree, error) = self.get(doc)
 
         return success
 
@@ -525,6 +1257,72 @@ class EngageApi(EngageApiCore):
 
     def add_recipient(self, list_id, created_from, columns, **kwargs):
         """Adds a new contact to an existing database"""
+        (doc, list_ids, emails) = self._add_recipient_envelope(list_id, created_from, columns, **kwargs)
+
+        (success, tree, error) = self._change_recipients(doc, list_ids, emails)
+
+        return success
+
+    def add_recipients(self, list_id, rows, created_from=CONTACT_CREATED_MANUALLY, concurrency=DEFAULT_CONCURRENCY,
+                       **kwargs):
+        """Adds many contacts to an existing database, several at a time.
+
+        Rows are consumed lazily and sent as one ``AddRecipient`` request each
+        on ``concurrency`` worker threads. Failed rows don't raise, their fault
+        is part of their result. Configure a ``session_pool_size`` (and a
+        ``pool_maxsize``) matching ``concurrency`` to spread the requests over
+        several sessions.
+
+        Example::
+
+            for result in api.add_recipients(list_id, rows, update_if_found=True):
+                if not result.success:
+                    log.warning('Row %s failed: %s', result.row_id, result.fault_string)
+
+        Args:
+            rows (iterable): Dicts of columns, or ``(row_id, columns)`` tuples. The position of
+                the row is used as its id otherwise.
+            concurrency (int): Maximum number of requests in flight
+            kwargs: Options of ``add_recipient`` which apply to all rows
+
+        Returns:
+            generator -- ``RowResult`` of each row, in the order of the rows
+        """
+        if not isinstance(kwargs.get('contact_lists', []), (list, tuple)):
+            # Shared by all rows, so it can't be streamed
+            kwargs['contact_lists'] = list(kwargs['contact_lists'])
+
+        def add(item):
+            (row_id, columns) = item
+            try:
+                (doc, list_ids, emails) = self._add_recipient_envelope(list_id, created_from, columns, **kwargs)
+                result = self._change_recipients(doc, list_ids, emails, raise_on_error=False)
+            except Exception as e:
+                return RowResult(row_id, False, None, Fault(None, str(e), None))
+
+            recipient_id = None
+            if result.success:
+                recipient_id = self._parser.find(result.tree, 'Body/RESULT/RecipientId')
+                recipient_id = int(recipient_id.text) if recipient_id is not None and recipient_id.text else None
+            return RowResult(row_id, result.success, recipient_id, result.error)
+
+        def items():
+            for position, row in enumerate(rows):
+                yield row if isinstance(row, tuple) else (position, row)
+
+        executor = Executor(concurrency)
+        try:
+            for result in executor.imap(add, items()):
+                yield result
+        finally:
+            executor.shutdown(wait=False)
+
+    def _add_recipient_envelope(self, list_id, created_from, columns, **kwargs):
+        """Builds the envelope of ``AddRecipient``.
+
+        Returns:
+            tuple -- The envelope and the lists and addresses it changes (see ``_change_recipients``)
+        """
         if not created_from in CONTACT_CREATED_CHOICES:
             raise EngageError('Invalid CREATED_FROM')
 
@@ -537,31 +1335,33 @@ class EngageApi(EngageApiCore):
         if 'visitor_key' in kwargs:
             raise NotImplementedError()
 
-        body_node, doc = generate_envelope('AddRecipient')
-        append_text_node_to('LIST_ID', str(list_id), body_node)
-        append_text_node_to('CREATED_FROM', str(created_from), body_node)
+        contact_lists = kwargs.get('contact_lists', [])
+        assert not isinstance(contact_lists, basestring)
+
+        # Contact lists given as an iterator are streamed to Engage
+        doc = Envelope('AddRecipient', stream=not isinstance(contact_lists, (list, tuple)))
+        doc.append_text('LIST_ID', str(list_id))
+        doc.append_text('CREATED_FROM', str(created_from))
 
         if 'update_if_found' in kwargs and kwargs.get('update_if_found') is True:
-            append_text_node_to('UPDATE_IF_FOUND', 'true', body_node)
+            doc.append_text('UPDATE_IF_FOUND', 'true')
 
-        contact_lists = kwargs.get('contact_lists', [])
-        assert not isinstance(contact_lists, basestring)
         if contact_lists:
-            contact_lists_node = doc.createElement('CONTACT_LISTS')
-            for contact_id in contact_lists:
-                append_text_node_to('CONTACT_LIST_ID', contact_id, contact_lists_node)
-            body_node.appendChild(contact_lists_node)
+            doc.append_list(contact_lists,
+                            container_node_name='CONTACT_LISTS',
+                            item_node_name='CONTACT_LIST_ID')
 
         assert isinstance(columns, dict)
-        append_columns_to(columns, body_node)
+        doc.append_columns(columns)
 
         sync_fields = kwargs.get('sync_fields', {})
         assert isinstance(sync_fields, dict)
-        append_sync_fields_to(sync_fields, body_node)
-
-        (success, tree, self.error) = self.get(doc)
+        doc.append_sync_fields(sync_fields)
 
-        return success
+        # Streamed contact lists are unknown once they've been sent
+        list_ids = [list_id] + list(contact_lists) if isinstance(contact_lists, (list, tuple)) else None
+        emails = column_emails(columns) + column_emails(sync_fields)
+        return (doc, list_ids, emails)
 
     def update_recipient(self, list_id, columns, **kwargs):
         """Updates a contact"""
@@ -586,23 +1386,24 @@ class EngageApi(EngageApiCore):
         if 'snooze_settings' in kwargs:
             raise NotImplementedError()
 
-        body_node, doc = generate_envelope('UpdateRecipient')
-        append_text_node_to('LIST_ID', str(list_id), body_node)
+        doc = Envelope('UpdateRecipient')
+        doc.append_text('LIST_ID', str(list_id))
 
         old_email = kwargs.get('old_email')
         if old_email:
-            append_text_node_to('OLD_EMAIL', old_email, body_node)
+            doc.append_text('OLD_EMAIL', old_email)
 
         # Append columns
         assert isinstance(columns, dict)
-        append_columns_to(columns, body_node)
+        doc.append_columns(columns)
 
         # Append sync fields
         sync_fields = kwargs.get('sync_fields', {})
         assert isinstance(sync_fields, dict)
-        append_sync_fields_to(sync_fields, body_node)
+        doc.append_sync_fields(sync_fields)
 
-        (success, tree, self.error) = self.get(doc)
+        emails = column_emails(columns) + ([old_email] if old_email else [])
+        (success, tree, error) = self._change_recipients(doc, [list_id], emails)
 
         return success
 
@@ -614,23 +1415,118 @@ class EngageApi(EngageApiCore):
 
     def select_recipient_data(self, list_id, email, **kwargs):
         """Queries a contact's details"""
-        body_node, doc = generate_envelope('SelectRecipientData')
-        append_text_node_to('LIST_ID', str(list_id), body_node)
-        append_text_node_to('EMAIL', str(email), body_node)
+        doc = Envelope('SelectRecipientData')
+        doc.append_text('LIST_ID', str(list_id))
+        doc.append_text('EMAIL', str(email))
 
         recipient_id = kwargs.get('recipient_id')
         if recipient_id:
-            append_text_node_to('RECIPIENT_ID', str(recipient_id), body_node)
+            doc.append_text('RECIPIENT_ID', str(recipient_id))
 
         encoded_recipient_id = kwargs.get('encoded_recipient_id')
-        if recipient_id:
-            append_text_node_to('ENCODED_RECIPIENT_ID', str(encoded_recipient_id), body_node)
+        if encoded_recipient_id:
+            doc.append_text('ENCODED_RECIPIENT_ID', str(encoded_recipient_id))
 
         visitor_key = kwargs.get('visitor_key')
-        if recipient_id:
-            append_text_node_to('VISITOR_KEY', str(visitor_key), body_node)
+        if visitor_key:
+            doc.append_text('VISITOR_KEY', str(visitor_key))
+
+        key = None
+        cached = self._recipients is not None or self._missing_recipients is not None
+        if cached and not (recipient_id or encoded_recipient_id or visitor_key):
+            key = recipient_key(list_id, email)
+
+            missing = self._missing_recipients.get(key) if self._missing_recipients is not None else None
+            if missing is not None:
+                raise RecipientIsNotAMemberError(*missing)
+
+            contact = self._recipients.get(key) if self._recipients is not None else None
+            if contact is not None:
+                return contact
+
+        # Results of lookups which overlapped with changes of recipients aren't cached
+        generation = self._recipient_generation
+
+        try:
+            (success, tree, error) = self.get(doc, coalesce=True)
+        except RecipientIsNotAMemberError as e:
+            if key is not None and self._missing_recipients is not None:
+                self._cache_recipient(self._missing_recipients, key, (e.msg, e.code), generation)
+            raise
 
-        (success, tree, self.error) = self.get(doc)
         if success:
-            for el in tree.findall('Body/RESULT'):
-                return Contact.from_element(el, self)
+            for el in self._parser.findall(tree, 'Body/RESULT'):
+                contact = self._contact_class.from_element(el, self)
+                if key is not None and self._recipients is not None:
+                    self._cache_recipient(self._recipients, key, contact, generation)
+                return contact
+
+
+THREADED_METHODS = (
+    'login', 'logout', 'get_lists', 'get_catalog', 'export_list', 'get_job_status', 'start_import', 'import_list',
+    'add_list_column', 'get_contact_lists', 'get_databases', 'get_queries', 'get_seed_lists', 'get_test_lists',
+    'get_suppression_lists', 'get_relational_tables', 'get_list_meta_data', 'get_recipient_mailings',
+    'remove_recipient', 'insert_update_table', 'delete_table_data', 'create_contact_list', 'add_recipient',
+    'update_recipient', 'select_recipient_data',
+)
+
+
+class ThreadedEngageApi(object):
+    """Counterpart of ``EngageApi`` which runs its calls on worker threads.
+
+    Offers the same methods as ``EngageApi``, but each of them returns a
+    :class:`~.concurrency.Future` at once. The calls are run by a wrapped
+    ``EngageApi`` on ``concurrency`` worker threads which share its session
+    and connection pool, so envelopes and responses are handled exactly like
+    in the blocking client. Each call in flight occupies a worker thread, so
+    ``concurrency`` bounds the number of requests in flight.
+
+    Identical reads which are in flight at the same time share one request
+    (see ``EngageApiCore.get``), but each caller gets its own future and
+    hydrates its own resources from the shared response.
+
+    Args:
+        concurrency (int): Number of worker threads
+        max_pending (int): Maximum number of submitted calls. Further calls block until
+            earlier ones finished. ``None`` doesn't limit them.
+    """
+
+    def __init__(self, username, password, url, concurrency=DEFAULT_CONCURRENCY, max_pending=None, **kwargs):
+        kwargs.setdefault('pool_maxsize', concurrency)
+        self.api = EngageApi(username, password, url, **kwargs)
+        self._executor = Executor(concurrency, max_pending)
+
+    @property
+    def session(self):
+        return self.api.session
+
+    def submit(self, fn, *args, **kwargs):
+        """Runs any callable on the worker threads and returns a ``Future`` of its result"""
+        return self._executor.submit(fn, *args, **kwargs)
+
+    def add_recipients(self, list_id, rows, **kwargs):
+        """Runs ``EngageApi.add_recipients`` to completion.
+
+        Returns:
+            Future -- Future of the list of ``RowResult``
+        """
+        return self._executor.submit(lambda: list(self.api.add_recipients(list_id, rows, **kwargs)))
+
+    def close(self, wait=True):
+        """Stops the worker threads once all submitted calls are done and closes the session pool"""
+        self._executor.shutdown(wait)
+        self.api.close()
+
+
+def _submitting(name):
+    def method(self, *args, **kwargs):
+        return self._executor.submit(getattr(self.api, name), *args, **kwargs)
+
+    method.__name__ = name
+    method.__doc__ = getattr(EngageApi, name).__doc__
+    return method
+
+
+for _name in THREADED_METHODS:
+    setattr(ThreadedEngageApi, _name, _submitting(_name))
+del _name
@@ -0,0 +1,179 @@
+"""Caches of API results which are refreshed in the background."""
+
+import logging
+import sys
+import threading
+import time
+from .catalog import ListCatalog
+from .concurrency import Executor, Future
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogCache(object):
+    """Caches the ``ListCatalog`` of each ``(visibility, list_type)``.
+
+    Reads are served from the cache. Once an entry is older than ``ttl``
+    it is still returned at once, but a refresh is started in the
+    background (stale-while-revalidate). Entries older than ``max_stale``
+    are refreshed before they're returned.
+
+    A refresh swaps in a new catalog and tells the listeners which lists
+    were added, changed (their ``LAST_MODIFIED`` differs) or removed.
+
+    Args:
+        api (EngageApi): Client used to fetch the catalogs
+        ttl (float): Seconds after which an entry is refreshed in the background
+        max_stale (float): Seconds after which an entry isn't served anymore. ``None`` serves stale
+            entries no matter how old they are.
+        store (SQLiteStore): Store the catalogs are persisted to and restored from. Restored
+            catalogs keep their age, so they're refreshed like any other entry.
+    """
+
+    def __init__(self, api, ttl, max_stale=None, store=None):
+        self._api = api
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.store = store
+
+        self._entries = {}  # (catalog, fetched_at) by key
+        self._refreshing = {}  # Futures of the refreshes in flight by key
+        self._lock = threading.Lock()
+        self._executor = None
+        self._listeners = []
+
+    def add_listener(self, listener):
+        """Calls ``listener(key, changed_ids, removed_ids)`` after a catalog has been refreshed"""
+        self._listeners.append(listener)
+
+    def get(self, visibility, list_type):
+        """Returns the catalog of the given lists, fetching it if it isn't cached (anymore)"""
+        key = (visibility, list_type)
+        with self._lock:
+            entry = self._entries.get(key)
+
+        if entry is None and self.store is not None:
+            entry = self._restore(key)
+
+        if entry is None:
+            return self.refresh(visibility, list_type)
+
+        catalog, fetched_at = entry
+        age = time.time() - fetched_at
+        if self.max_stale is not None and age >= self.max_stale:
+            return self.refresh(visibility, list_type)
+
+        if age >= self.ttl:
+            self.refresh_async(visibility, list_type)
+
+        return catalog
+
+    def refresh(self, visibility, list_type):
+        """Fetches the catalog now and returns it. Waits for a refresh in flight instead of starting another one."""
+        return self._start_refresh((visibility, list_type), background=False).result()
+
+    def refresh_async(self, visibility, list_type):
+        """Refreshes the catalog in the background.
+
+        Returns:
+            Future -- Future of the refreshed catalog
+        """
+        return self._start_refresh((visibility, list_type), background=True)
+
+    def invalidate(self, visibility=None, list_type=None):
+        """Drops the cached catalogs of the given visibility and list type. ``None`` matches any."""
+        with self._lock:
+            for key in list(self._entries):
+                if visibility in (None, key[0]) and list_type in (None, key[1]):
+                    del self._entries[key]
+
+        if self.store is not None:
+            self.store.delete_catalog(visibility, list_type)
+
+    def _restore(self, key):
+        try:
+            stored = self.store.load_catalog(*key)
+            if stored is None:
+                return None
+
+            fields, fetched_at = stored
+            entry = (ListCatalog.from_dict(fields, self._api), fetched_at)
+        except (KeyError, TypeError, ValueError):
+            # Incomplete or written by an incompatible version, it's fetched again
+            logger.warning('Discarding the unreadable stored catalog %r', key, exc_info=True)
+            self.store.delete_catalog(*key)
+            return None
+
+        with self._lock:
+            return self._entries.setdefault(key, entry)
+
+    def close(self):
+        """Stops the background refreshes"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    def _start_refresh(self, key, background):
+        with self._lock:
+            future = self._refreshing.get(key)
+            if future is not None:
+                return future
+
+            if background:
+                if self._executor is None:
+                    self._executor = Executor(workers=1)
+                future = self._executor.submit(self._refresh, key, background)
+            else:
+                future = Future()
+            self._refreshing[key] = future
+
+        if not background:
+            try:
+                future.set_result(self._refresh(key, background))
+            except BaseException:
+                future.set_exception(sys.exc_info())
+
+        return future
+
+    def _refresh(self, key, background):
+        try:
+            catalog = self._api.get_catalog(*key)
+        except Exception:
+            if background:
+                # Readers keep getting the stale catalog
+                logger.exception('Refreshing the catalog %r failed', key)
+            with self._lock:
+                self._refreshing.pop(key, None)
+            raise
+
+        fetched_at = time.time()
+        if self.store is not None:
+            self.store.save_catalog(key[0], key[1], catalog.to_dict(), fetched_at)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            self._entries[key] = (catalog, fetched_at)
+            self._refreshing.pop(key, None)
+
+        if entry is not None and self._listeners:
+            changed_ids, removed_ids = diff_catalogs(entry[0], catalog)
+            if changed_ids or removed_ids:
+                for listener in self._listeners:
+                    listener(key, changed_ids, removed_ids)
+
+        return catalog
+
+
+def diff_catalogs(old, new):
+    """Compares two catalogs by ``LAST_MODIFIED``.
+
+    Returns:
+        tuple -- Ids of the lists which were added or changed and ids of the lists which were removed
+    """
+    changed_ids = []
+    for list_id, position in new.positions():
+        old_position = old.position_of(list_id)
+        if old_position is None or old.last_modified[old_position] != new.last_modified[position]:
+            changed_ids.append(list_id)
+
+    removed_ids = [list_id for list_id, position in old.positions() if list_id not in new]
+    return changed_ids, removed_ids
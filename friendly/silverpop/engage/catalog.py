@@ -0,0 +1,229 @@
+"""Column-wise catalog of the lists of an account."""
+
+from array import array
+from friendly.silverpop.helpers import parse_engage_date
+from .resources import LIST_TYPE_MAP, COMPACT_LIST_TYPE_MAP, List, CompactList
+
+_INT_FIELDS = (
+    # (tag, attribute)
+    ('ID', 'ids'),
+    ('TYPE', 'types'),
+    ('SIZE', 'sizes'),
+    ('NUM_OPT_OUTS', 'num_opt_outs'),
+    ('NUM_UNDELIVERABLE', 'num_undeliverable'),
+    ('VISIBILITY', 'visibilities'),
+    ('PARENT_FOLDER_ID', 'parent_folder_ids'),
+    ('SUPPRESSION_LIST_ID', 'suppression_list_ids'),
+)
+
+_STR_FIELDS = (
+    ('NAME', 'names'),
+    ('PARENT_NAME', 'parent_names'),
+    ('USER_ID', 'user_ids'),
+    ('LAST_MODIFIED', 'last_modified'),  # Parsed when a list is hydrated
+)
+
+# Bits of ``flags``
+IS_FOLDER = 1
+FLAGGED_FOR_BACKUP = 2
+
+
+class ListCatalog(object):
+    """Lists of an account, stored column by column.
+
+    Instead of one object per list the fields are kept in arrays (numbers)
+    and lists of shared strings, indexed by the position of the list in
+    the catalog. Lookups by id and name as well as the lists of a folder
+    are answered from hash indexes. Lists are hydrated into resources only
+    when they are requested; they don't keep their elements (``in_el``).
+
+    Example::
+
+        catalog = api.get_catalog(LIST_VISIBILITY_SHARED, LIST_TYPE_DATABASE)
+        database = catalog.get(settings.ENGAGE_DATABASE_ID)
+
+    Args:
+        api (EngageApi): Client the hydrated lists are bound to
+    """
+
+    def __init__(self, api=None):
+        self.api = api
+
+        for tag, attr in _INT_FIELDS:
+            setattr(self, attr, array('l'))
+        for tag, attr in _STR_FIELDS:
+            setattr(self, attr, [])
+        self.flags = array('B')
+
+        self._strings = {}  # Shares equal strings between the lists
+        self._by_id = {}  # Positions by list id
+        self._by_name = {}  # Positions by name. A tuple of positions for ambiguous names.
+        self._by_folder = {}  # Positions of the lists by the id of their parent folder
+
+    @classmethod
+    def from_elements(cls, elements, api=None):
+        """Builds a catalog from ``LIST`` elements"""
+        catalog = cls(api)
+        for el in elements:
+            catalog.append_element(el)
+        return catalog
+
+    @classmethod
+    def from_dict(cls, fields, api=None):
+        """Builds a catalog from the fields returned by ``to_dict``"""
+        catalog = cls(api)
+        intern = catalog._strings.setdefault
+        for tag, attr in _INT_FIELDS:
+            getattr(catalog, attr).extend(fields[attr])
+        for tag, attr in _STR_FIELDS:
+            getattr(catalog, attr).extend(intern(text, text) if text is not None else None for text in fields[attr])
+        catalog.flags.extend(fields['flags'])
+
+        for position in xrange(len(catalog.ids)):
+            catalog._add_to_indexes(position)
+        return catalog
+
+    def to_dict(self):
+        """Returns the fields of the lists, column by column, as JSON serializable lists"""
+        positions = sorted(self._by_id.itervalues())
+        fields = {'flags': [self.flags[position] for position in positions]}
+        for tag, attr in _INT_FIELDS + _STR_FIELDS:
+            values = getattr(self, attr)
+            fields[attr] = [values[position] for position in positions]
+        return fields
+
+    def append_element(self, el):
+        """Adds a ``LIST`` element of a ``GetLists`` response. A list already in the catalog is replaced."""
+        list_id = int(el.findtext('ID'))
+        if list_id in self._by_id:
+            self._remove_from_indexes(self._by_id[list_id])
+
+        position = len(self.ids)
+        intern = self._strings.setdefault
+        for tag, attr in _INT_FIELDS:
+            text = el.findtext(tag)
+            getattr(self, attr).append(int(text) if text else 0)
+        for tag, attr in _STR_FIELDS:
+            text = el.findtext(tag)
+            getattr(self, attr).append(intern(text, text) if text is not None else None)
+
+        flags = 0
+        if _is_true(el.findtext('IS_FOLDER')):
+            flags |= IS_FOLDER
+        if _is_true(el.findtext('FLAGGED_FOR_BACKUP')):
+            flags |= FLAGGED_FOR_BACKUP
+        self.flags.append(flags)
+
+        self._add_to_indexes(position)
+
+    def _add_to_indexes(self, position):
+        self._by_id[self.ids[position]] = position
+
+        name = self.names[position]
+        positions = self._by_name.get(name)
+        if positions is None:
+            self._by_name[name] = position
+        elif isinstance(positions, tuple):
+            self._by_name[name] = positions + (position, )
+        else:
+            self._by_name[name] = (positions, position)
+
+        self._by_folder.setdefault(self.parent_folder_ids[position], []).append(position)
+
+    def _remove_from_indexes(self, position):
+        # The fields stay in the arrays, only the indexes forget about the replaced list
+        del self._by_id[self.ids[position]]
+
+        name = self.names[position]
+        positions = self._by_name[name]
+        if isinstance(positions, tuple):
+            positions = tuple(p for p in positions if p != position)
+            self._by_name[name] = positions[0] if len(positions) == 1 else positions
+        else:
+            del self._by_name[name]
+
+        self._by_folder[self.parent_folder_ids[position]].remove(position)
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __contains__(self, list_id):
+        return list_id in self._by_id
+
+    def __iter__(self):
+        for position in sorted(self._by_id.itervalues()):
+            yield self.hydrate(position)
+
+    def positions(self):
+        """Returns ``(list_id, position)`` pairs of all lists"""
+        return self._by_id.items()
+
+    def position_of(self, list_id):
+        """Returns the position of a list within the arrays or ``None``"""
+        return self._by_id.get(list_id)
+
+    def get(self, list_id, default=None):
+        """Returns the list with the given id"""
+        position = self._by_id.get(list_id)
+        return self.hydrate(position) if position is not None else default
+
+    def __getitem__(self, list_id):
+        position = self._by_id.get(list_id)
+        if position is None:
+            raise KeyError(list_id)
+        return self.hydrate(position)
+
+    def filter_by_name(self, name):
+        """Returns all lists with the given name. Names are unique per folder only."""
+        positions = self._by_name.get(name, ())
+        if not isinstance(positions, tuple):
+            positions = (positions, )
+        return [self.hydrate(position) for position in positions]
+
+    def find(self, name):
+        """Returns the first list with the given name or ``None``"""
+        positions = self._by_name.get(name)
+        if positions is None:
+            return None
+        return self.hydrate(positions[0] if isinstance(positions, tuple) else positions)
+
+    def children(self, folder_id):
+        """Returns the lists and folders within the given folder"""
+        return [self.hydrate(position) for position in self._by_folder.get(folder_id, ())]
+
+    def descendant_ids(self, folder_id):
+        """Yields the ids of all lists and folders below the given folder, depth first"""
+        visited = set([folder_id])
+        stack = list(reversed(self._by_folder.get(folder_id, ())))
+        while stack:
+            position = stack.pop()
+            list_id = self.ids[position]
+            yield list_id
+            if self.flags[position] & IS_FOLDER and list_id not in visited:
+                visited.add(list_id)
+                stack.extend(reversed(self._by_folder.get(list_id, ())))
+
+    def hydrate(self, position):
+        """Builds the resource of the list at the given position"""
+        list_type = self.types[position]
+        if getattr(self.api, 'compact', False):
+            list_class = COMPACT_LIST_TYPE_MAP.get(list_type, CompactList)
+        else:
+            list_class = LIST_TYPE_MAP.get(list_type, List)
+
+        obj = list_class()
+        set_attribute = object.__setattr__
+        for tag, attr in _INT_FIELDS + _STR_FIELDS:
+            set_attribute(obj, tag.lower(), getattr(self, attr)[position])
+
+        last_modified = self.last_modified[position]
+        set_attribute(obj, 'last_modified',
+                      parse_engage_date(last_modified) if last_modified is not None else None)
+        set_attribute(obj, 'is_folder', bool(self.flags[position] & IS_FOLDER))
+        set_attribute(obj, 'flagged_for_backup', bool(self.flags[position] & FLAGGED_FOR_BACKUP))
+        set_attribute(obj, 'api', self.api)
+        return obj
+
+
+def _is_true(text):
+    return text is not None and text.strip().lower() == 'true'
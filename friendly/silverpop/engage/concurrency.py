@@ -0,0 +1,168 @@
+"""Futures and a bounded worker pool for running API calls concurrently."""
+
+import sys
+import threading
+import Queue
+from collections import deque
+
+
+class TimeoutError(Exception):
+    pass
+
+
+class Future(object):
+    """Result of a call which may not have finished yet"""
+
+    def __init__(self):
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._result = None
+        self._exc_info = None
+        self._callbacks = []
+
+    def done(self):
+        return self._done.is_set()
+
+    def result(self, timeout=None):
+        """Waits for the call and returns its result or raises its exception.
+
+        Raises:
+            TimeoutError -- If the call didn't finish within ``timeout`` seconds
+        """
+        if not self._done.wait(timeout):
+            raise TimeoutError()
+
+        if self._exc_info is not None:
+            raise self._exc_info[0], self._exc_info[1], self._exc_info[2]
+
+        return self._result
+
+    def exception(self, timeout=None):
+        """Waits for the call and returns the exception it raised, if any"""
+        if not self._done.wait(timeout):
+            raise TimeoutError()
+
+        return self._exc_info[1] if self._exc_info is not None else None
+
+    def add_done_callback(self, fn):
+        """Calls ``fn(future)`` once the future is done (immediately if it's done already)"""
+        with self._lock:
+            if not self._done.is_set():
+                self._callbacks.append(fn)
+                return
+        fn(self)
+
+    def set_result(self, result):
+        self._result = result
+        self._finish()
+
+    def set_exception(self, exc_info):
+        """Sets the exception of the call as returned by ``sys.exc_info()``"""
+        self._exc_info = exc_info
+        self._finish()
+
+    def _finish(self):
+        with self._lock:
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+
+        for fn in callbacks:
+            fn(self)
+
+
+_STOP = object()
+
+
+class Executor(object):
+    """Runs calls on a fixed number of worker threads.
+
+    Args:
+        workers (int): Maximum number of calls running at the same time
+        max_pending (int): Maximum number of submitted calls which haven't finished yet.
+            ``submit`` blocks while the limit is reached. ``None`` doesn't limit them.
+    """
+
+    def __init__(self, workers=10, max_pending=None):
+        self.workers = workers
+        self._queue = Queue.Queue()
+        self._pending = threading.BoundedSemaphore(max_pending) if max_pending else None
+        self._threads = []
+        self._lock = threading.Lock()
+        self._shutdown = False
+
+    def submit(self, fn, *args, **kwargs):
+        """Schedules ``fn(*args, **kwargs)`` and returns a ``Future`` of its result"""
+        if self._shutdown:
+            raise RuntimeError('Cannot submit calls after shutdown')
+
+        if self._pending is not None:
+            self._pending.acquire()
+
+        self._start_workers()
+
+        future = Future()
+        self._queue.put((future, fn, args, kwargs))
+        return future
+
+    def map(self, fn, iterable):
+        """Submits ``fn`` for each item and returns the futures in the same order"""
+        return [self.submit(fn, item) for item in iterable]
+
+    def imap(self, fn, iterable, window=None):
+        """Yields ``fn(item)`` for each item in order, while the following items are being processed.
+
+        The iterable is consumed lazily: at most ``window`` items (twice the
+        number of workers by default) are in flight at the same time.
+        """
+        window = window or 2 * self.workers
+        pending = deque()
+        for item in iterable:
+            pending.append(self.submit(fn, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+
+    def shutdown(self, wait=True):
+        """Stops the workers once all submitted calls are done"""
+        with self._lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+            threads = list(self._threads)
+
+        for _ in threads:
+            self._queue.put(_STOP)
+
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    def _start_workers(self):
+        if len(self._threads) >= self.workers:
+            return
+
+        with self._lock:
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._work, name='engage-worker-%d' % len(self._threads))
+                thread.daemon = True
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+
+            future, fn, args, kwargs = item
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException:
+                future.set_exception(sys.exc_info())
+            else:
+                future.set_result(result)
+            finally:
+                if self._pending is not None:
+                    self._pending.release()
@@ -53,6 +53,8 @@ CONTACT_CREATED_MANUALLY = 1
 CONTACT_CREATED_OPTED_IN = 2
 CONTACT_CREATED_FROM_TRACKING_DB = 3
 
+SESSION_TIMEOUT = 30 * 60  # Seconds of inactivity after which Engage expires a session
+
 ERR_RECIPIENT_ALREADY_EXISTS = 122
 ERR_RECIPIENT_IS_NOT_A_MEMBER = 128
 ERR_SESSION_EXPIRED_OR_INVALID = 145
@@ -68,6 +70,35 @@ EXPORT_FORMAT_CSV = 'CSV'
 EXPORT_FORMAT_TAB = 'TAB'
 EXPORT_FORMAT_PIPE = 'PIPE'
 
+IMPORT_ACTION_CREATE = 'CREATE'
+IMPORT_ACTION_ADD_ONLY = 'ADD_ONLY'
+IMPORT_ACTION_UPDATE_ONLY = 'UPDATE_ONLY'
+IMPORT_ACTION_ADD_AND_UPDATE = 'ADD_AND_UPDATE'
+IMPORT_ACTION_OPT_OUT = 'OPT_OUT'
+
+IMPORT_ACTION_CHOICES = (
+    IMPORT_ACTION_ADD_ONLY,
+    IMPORT_ACTION_UPDATE_ONLY,
+    IMPORT_ACTION_ADD_AND_UPDATE,
+    IMPORT_ACTION_OPT_OUT,
+)
+
+IMPORT_FILE_TYPE_CSV = 0
+IMPORT_FILE_TYPE_TAB = 1
+IMPORT_FILE_TYPE_PIPE = 2
+
+JOB_STATUS_WAITING = 'WAITING'
+JOB_STATUS_RUNNING = 'RUNNING'
+JOB_STATUS_CANCELED = 'CANCELED'
+JOB_STATUS_ERROR = 'ERROR'
+JOB_STATUS_COMPLETE = 'COMPLETE'
+
+JOB_STATUS_FINISHED = (
+    JOB_STATUS_CANCELED,
+    JOB_STATUS_ERROR,
+    JOB_STATUS_COMPLETE,
+)
+
 #ERRORS = (
 #    (ERR_RECIPIENT_IS_NOT_A_MEMBER, EngageError),
 #    (ERR_SESSION_EXPIRED_OR_INVALID, EngageError),
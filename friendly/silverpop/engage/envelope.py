@@ -0,0 +1,289 @@
+"""Byte-level serialization of request envelopes.
+
+The output is identical to what ``xml.dom.minidom`` produces for the same
+envelope, but only the variable values are escaped; everything else is
+precompiled per action.
+"""
+
+import zlib
+
+XML_DECLARATION = '<?xml version="1.0" encoding="utf-8"?>'
+
+CHUNK_SIZE = 64 * 1024  # Size of the chunks yielded by streaming envelopes
+
+GZIP_LEVEL = 6
+GZIP_WBITS = 16 + zlib.MAX_WBITS  # Makes zlib write a gzip header and trailer
+
+_heads = {}  # Compiled (head, tail, empty) byte strings per action
+
+
+def escape(value):
+    """Escapes a text value the way minidom does and encodes it as UTF-8
+
+    Raises:
+        TypeError -- If the value is ``None``, like minidom does. Pass ``''`` for empty values.
+    """
+    if not isinstance(value, basestring):
+        if value is None:
+            raise TypeError('Cannot serialize None, pass an empty string for empty values')
+        value = unicode(value)
+
+    if isinstance(value, unicode):
+        value = value.encode('utf-8')
+
+    if '&' in value:
+        value = value.replace('&', '&amp;')
+    if '<' in value:
+        value = value.replace('<', '&lt;')
+    if '"' in value:
+        value = value.replace('"', '&quot;')
+    if '>' in value:
+        value = value.replace('>', '&gt;')
+
+    return value
+
+
+def compile_action(action):
+    """Returns the precompiled ``(head, tail, empty)`` bytes of an action.
+
+    Args:
+        action (str): Name of the API action, e.g. ``AddRecipient``
+
+    Returns:
+        tuple -- Opening bytes, closing bytes and the complete envelope without any children
+    """
+    compiled = _heads.get(action)
+    if compiled is None:
+        head = '%s<Envelope><Body><%s>' % (XML_DECLARATION, action)
+        tail = '</%s></Body></Envelope>' % action
+        empty = '%s<Envelope><Body><%s/></Body></Envelope>' % (XML_DECLARATION, action)
+        compiled = _heads[action] = (head, tail, empty)
+    return compiled
+
+
+def text_node(tag, text):
+    """Serializes a single text node"""
+    return '<%s>%s</%s>' % (tag, escape(text), tag)
+
+
+def buffered(chunks, size=CHUNK_SIZE):
+    """Joins small chunks into blocks of at least ``size`` bytes"""
+    buf = []
+    buffered_size = 0
+    for chunk in chunks:
+        buf.append(chunk)
+        buffered_size += len(chunk)
+        if buffered_size >= size:
+            yield ''.join(buf)
+            buf = []
+            buffered_size = 0
+
+    if buf:
+        yield ''.join(buf)
+
+
+class EnvelopeTemplate(object):
+    """Precompiled envelope for actions with a fixed sequence of text nodes.
+
+    Example::
+
+        LOGIN = EnvelopeTemplate('Login', ('USERNAME', 'PASSWORD'))
+        data = LOGIN.render('john', 'secret')
+    """
+
+    def __init__(self, action, tags=()):
+        self.action = action
+        self.tags = tuple(tags)
+
+        head, tail, empty = compile_action(action)
+        if not self.tags:
+            self._segments = [empty]
+        else:
+            segments = [head + '<%s>' % self.tags[0]]
+            for previous, tag in zip(self.tags, self.tags[1:]):
+                segments.append('</%s><%s>' % (previous, tag))
+            segments.append('</%s>%s' % (self.tags[-1], tail))
+            self._segments = segments
+
+    def render(self, *values):
+        """Renders the envelope with the given values.
+
+        Returns:
+            str -- The UTF-8 encoded request body
+        """
+        if len(values) != len(self.tags):
+            raise ValueError('%s expects %d values, got %d' % (self.action, len(self.tags), len(values)))
+
+        chunks = [None] * (2 * len(values) + 1)
+        chunks[0::2] = self._segments
+        chunks[1::2] = [escape(value) for value in values]
+        return ''.join(chunks)
+
+
+class Envelope(object):
+    """Envelope for actions with a variable body which is serialized straight into bytes.
+
+    Mirrors ``generate_envelope`` and the ``append_*_to`` helpers without building a DOM.
+
+    A streaming envelope (``stream=True``) doesn't serialize its containers
+    when they are appended. They are consumed lazily by ``iter_chunks``
+    instead, so the request body can be sent with chunked transfer encoding
+    and the peak memory doesn't depend on the payload size.
+    """
+
+    def __init__(self, action, stream=False):
+        self.action = action
+        self.stream = stream
+        self._parts = []
+
+    def append_text(self, tag, text):
+        self._parts.append(text_node(tag, text))
+        return self
+
+    def append_namevalues(self, nv, container_node_name=None, item_node_name='COLUMN'):
+        assert isinstance(nv, dict)
+
+        def parts():
+            for name in nv.keys():
+                yield '<%s><NAME>%s</NAME><VALUE>%s</VALUE></%s>' % (
+                    item_node_name, escape(name), escape(nv[name]), item_node_name)
+
+        self._append_container(container_node_name, parts)
+        return self
+
+    def append_columns(self, columns):
+        return self.append_namevalues(columns)
+
+    def append_sync_fields(self, fields):
+        return self.append_namevalues(fields, container_node_name='SYNC_FIELDS', item_node_name='SYNC_FIELD')
+
+    def append_list(self, items, container_node_name='COLUMNS', item_node_name='COLUMN'):
+        def parts():
+            for item in items:
+                yield text_node(item_node_name, item)
+
+        self._append_container(container_node_name, parts)
+        return self
+
+    def append_rows(self, rows, container_node_name='ROWS', item_node_name='ROW', column_node_name='COLUMN'):
+        """Appends rows of a relational table.
+
+        Args:
+            rows (iterable): Dicts mapping column names to values. Consumed lazily by streaming envelopes.
+
+        Raises:
+            TypeError -- If a row isn't a dict. Rows of a list or tuple are checked at once, those
+                of other iterables while they're serialized.
+        """
+        if isinstance(rows, (list, tuple)):
+            for row in rows:
+                _check_row(row)
+
+        def parts():
+            for row in rows:
+                _check_row(row)
+                yield '<%s>' % item_node_name
+                for name in row.keys():
+                    yield '<%s name="%s">%s</%s>' % (column_node_name, escape(name), escape(row[name]),
+                                                     column_node_name)
+                yield '</%s>' % item_node_name
+
+        self._append_container(container_node_name, parts)
+        return self
+
+    def _append_container(self, container_node_name, parts):
+        if self.stream:
+            self._parts.append((container_node_name, parts))
+        else:
+            self._parts.extend(self._serialize_container(container_node_name, parts))
+
+    def _serialize_container(self, container_node_name, parts):
+        if container_node_name is None:
+            for part in parts():
+                yield part
+            return
+
+        empty = True
+        for part in parts():
+            if empty:
+                yield '<%s>' % container_node_name
+                empty = False
+            yield part
+
+        if empty:
+            yield '<%s/>' % container_node_name
+        else:
+            yield '</%s>' % container_node_name
+
+    def iter_chunks(self):
+        """Yields the UTF-8 encoded request body chunk by chunk"""
+        head, tail, empty = compile_action(self.action)
+        if not self._parts:
+            yield empty
+            return
+
+        yield head
+        for part in self._parts:
+            if isinstance(part, tuple):
+                for chunk in self._serialize_container(*part):
+                    yield chunk
+            else:
+                yield part
+        yield tail
+
+    def tobytes(self):
+        """Returns the UTF-8 encoded request body"""
+        return ''.join(self.iter_chunks())
+
+
+def _check_row(row):
+    if not isinstance(row, dict):
+        raise TypeError('Rows must be dicts, got %s' % type(row).__name__)
+
+
+def gzip_body(body):
+    """Compresses a request body, as returned by ``to_body``, with gzip"""
+    if isinstance(body, str):
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, GZIP_WBITS)
+        return compressor.compress(body) + compressor.flush()
+
+    return _gzip_chunks(body)
+
+
+def _gzip_chunks(chunks):
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, GZIP_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def is_replayable(doc):
+    """Tells wether ``doc`` can be sent more than once.
+
+    Streaming envelopes consume their containers while being sent.
+    """
+    return not (isinstance(doc, Envelope) and doc.stream)
+
+
+def to_body(doc):
+    """Returns the request body for ``doc``.
+
+    Streaming envelopes are returned as a generator of chunks, everything else as bytes.
+    """
+    if isinstance(doc, Envelope) and doc.stream:
+        return buffered(doc.iter_chunks())
+
+    return to_bytes(doc)
+
+
+def to_bytes(doc):
+    """Serializes an ``Envelope``, a minidom ``Document`` or already rendered bytes"""
+    if isinstance(doc, str):
+        return doc
+
+    if isinstance(doc, Envelope):
+        return doc.tobytes()
+
+    return doc.toxml(encoding='utf-8')
@@ -21,6 +21,10 @@ class RecipientAlreadyExistsError(EngageError):
     pass
 
 
+class RecipientIsNotAMemberError(EngageError):
+    pass
+
+
 class UnsupportedExportTypeError(EngageError):
     pass
 
@@ -34,4 +38,8 @@ class ContactListNameAlreadyExists(EngageError):
 
 
 class UnsupportedExportFormatError(EngageError):
+    pass
+
+
+class JobFailedError(EngageError):
     pass
\ No newline at end of file
@@ -0,0 +1,250 @@
+"""Bulk loads of recipients through ``ImportList`` jobs.
+
+Rows are streamed into a CSV source file and the mapping file is generated
+from the ``Table`` of the database. Both are uploaded with a file transfer
+backend before the import is started.
+"""
+
+import csv
+import itertools
+from abc import ABCMeta, abstractmethod
+import os
+import shutil
+import tempfile
+import uuid
+from datetime import date, datetime
+from .constants import IMPORT_ACTION_ADD_AND_UPDATE, IMPORT_ACTION_UPDATE_ONLY, IMPORT_ACTION_OPT_OUT, \
+    IMPORT_ACTION_CHOICES, IMPORT_FILE_TYPE_CSV, COLUMN_TYPE_YESNO
+from .envelope import text_node
+
+DATE_FORMAT = '%m/%d/%Y'
+LIST_DATE_FORMAT = 'mm/dd/yyyy'  # DATE_FORMAT in the notation of the mapping file
+
+# Spellings of the values of YESNO columns
+YES_VALUES = frozenset(['yes', 'y', 'true', 't', '1', 'on'])
+NO_VALUES = frozenset(['no', 'n', 'false', 'f', '0', 'off'])
+
+
+class FileTransfer(object):
+    """Abstract backend which puts files where Engage picks them up (the ``upload`` directory of the account's FTP)"""
+
+    __metaclass__ = ABCMeta
+
+    @abstractmethod
+    def upload(self, local_path, remote_name):
+        """Uploads a local file under the given name"""
+
+
+class LocalDirectoryTransfer(FileTransfer):
+    """Copies the files into a local directory, e.g. a mounted share or a directory used by tests"""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def upload(self, local_path, remote_name):
+        shutil.copyfile(local_path, os.path.join(self.directory, remote_name))
+
+
+class FTPTransfer(FileTransfer):
+    """Uploads the files to the FTP server of the Engage account.
+
+    Args:
+        host (str): Host name of the FTP server, e.g. ``transfer5.silverpop.com``
+        directory (str): Directory Engage imports from
+        tls (bool): Wether to use FTPS
+    """
+
+    def __init__(self, host, username, password, directory='upload', tls=True):
+        self.host = host
+        self.username = username
+        self.password = password
+        self.directory = directory
+        self.tls = tls
+
+    def upload(self, local_path, remote_name):
+        import ftplib
+
+        ftp = ftplib.FTP_TLS(self.host) if self.tls else ftplib.FTP(self.host)
+        try:
+            ftp.login(self.username, self.password)
+            if self.tls:
+                ftp.prot_p()
+            ftp.cwd(self.directory)
+            with open(local_path, 'rb') as f:
+                ftp.storbinary('STOR %s' % remote_name, f)
+        finally:
+            ftp.quit()
+
+
+def format_value(value, column=None):
+    """Formats a value for the source file"""
+    if value is None:
+        return ''
+
+    if isinstance(value, bool):
+        return 'Yes' if value else 'No'
+
+    if column is not None and column.type == COLUMN_TYPE_YESNO:
+        if isinstance(value, basestring):
+            # Known spellings are normalized, anything else is left to Engage
+            spelling = value.strip().lower()
+            if spelling in YES_VALUES:
+                return 'Yes'
+            if spelling in NO_VALUES:
+                return 'No'
+        elif isinstance(value, (int, long)):
+            return 'Yes' if value else 'No'
+
+    if isinstance(value, (datetime, date)):
+        return value.strftime(DATE_FORMAT)
+
+    if isinstance(value, unicode):
+        return value.encode('utf-8')
+
+    return str(value)
+
+
+class ListImport(object):
+    """Imports rows into a database with an ``ImportList`` job.
+
+    Example::
+
+        job = ListImport(api, database, LocalDirectoryTransfer('/mnt/engage/upload')).run(rows)
+
+    Args:
+        api (EngageApi): Client the import is started with
+        database (Database): Database to import into. Its meta-data is fetched if needed.
+        transfer (FileTransfer): Backend the files are uploaded with
+        action (str): One of ``IMPORT_ACTION_CHOICES``
+        sync_fields (list): Names of the columns identifying existing recipients. The key
+            columns of the database are used by default.
+        name (str): Prefix of the file names. A random one is used by default.
+    """
+
+    def __init__(self, api, database, transfer, action=IMPORT_ACTION_ADD_AND_UPDATE, sync_fields=None, name=None):
+        if action not in IMPORT_ACTION_CHOICES:
+            raise ValueError('Unknown import action: %r' % action)
+
+        self.api = api
+        self.database = database
+        self.transfer = transfer
+        self.action = action
+        self.sync_fields = sync_fields
+        self.name = name or 'import-%s' % uuid.uuid4().hex
+        self.count = 0  # Number of rows written to the source file
+
+    @property
+    def source_file(self):
+        return '%s.csv' % self.name
+
+    @property
+    def map_file(self):
+        return '%s.xml' % self.name
+
+    @property
+    def table(self):
+        if not hasattr(self.database, '_table'):
+            self.database.get_meta_data()
+        return self.database._table
+
+    def resolve_columns(self, names):
+        """Returns the columns of the table with the given ids or names
+
+        Raises:
+            ValueError -- If the table has no such column
+        """
+        columns = []
+        for name in names:
+            column = self.table.get_column(name)
+            if column is None:
+                raise ValueError('Database has no column "{0}". Available columns: {1}'.format(
+                    name, ', '.join(self.table.column_names)))
+            columns.append(column)
+        return columns
+
+    def write_source(self, f, rows, columns=None):
+        """Writes the rows as CSV with a header row.
+
+        Args:
+            rows (iterable): Dicts mapping column ids or names to values. Consumed lazily.
+            columns (list): Ids or names of the columns to import. The keys of the first row by default.
+
+        Returns:
+            list -- The imported columns
+        """
+        rows = iter(rows)
+        first = next(rows, None)
+        if columns is None:
+            columns = sorted(first.keys()) if first is not None else []
+
+        keys = list(columns)
+        columns = self.resolve_columns(keys)
+
+        writer = csv.writer(f)
+        writer.writerow([format_value(column.name) for column in columns])
+
+        self.count = 0
+        if first is not None:
+            for row in itertools.chain([first], rows):
+                unknown = set(row) - set(keys)
+                if unknown:
+                    raise ValueError('Row has unknown columns: %s' % ', '.join(sorted(unknown)))
+
+                writer.writerow([format_value(row.get(key), column) for key, column in zip(keys, columns)])
+                self.count += 1
+
+        return columns
+
+    def mapping(self, columns):
+        """Returns the mapping file of the source file's columns"""
+        parts = ['<LIST_IMPORT><LIST_INFO>',
+                 text_node('ACTION', self.action),
+                 text_node('LIST_ID', self.database.id),
+                 text_node('FILE_TYPE', IMPORT_FILE_TYPE_CSV),
+                 text_node('HASHEADERS', 'true'),
+                 text_node('LIST_DATE_FORMAT', LIST_DATE_FORMAT),
+                 '</LIST_INFO>']
+
+        # SYNC_FIELDS is a sibling of LIST_INFO and MAPPING
+        if self.action in (IMPORT_ACTION_ADD_AND_UPDATE, IMPORT_ACTION_UPDATE_ONLY, IMPORT_ACTION_OPT_OUT):
+            sync_fields = self.sync_fields
+            if sync_fields is None:
+                sync_fields = [column.name for column in self.resolve_columns(self.table.key_columns)]
+            if sync_fields:
+                parts.append('<SYNC_FIELDS>')
+                parts.extend('<SYNC_FIELD>%s</SYNC_FIELD>' % text_node('NAME', name) for name in sync_fields)
+                parts.append('</SYNC_FIELDS>')
+
+        parts.append('<MAPPING>')
+        for index, column in enumerate(columns, 1):
+            parts.append('<COLUMN>%s%s%s</COLUMN>' % (
+                text_node('INDEX', index), text_node('NAME', column.name), text_node('INCLUDE', 'true')))
+        parts.append('</MAPPING></LIST_IMPORT>')
+
+        return ''.join(parts)
+
+    def upload(self, rows, columns=None):
+        """Writes and uploads the source and mapping file.
+
+        The source file is spooled to a temporary file, so the rows are never held in memory.
+        """
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                columns = self.write_source(f, rows, columns)
+            self.transfer.upload(path, self.source_file)
+
+            with open(path, 'wb') as f:
+                f.write(self.mapping(columns))
+            self.transfer.upload(path, self.map_file)
+        finally:
+            os.remove(path)
+
+    def run(self, rows, columns=None):
+        """Uploads the rows and starts the import.
+
+        Returns:
+            Job -- Handle of the import job
+        """
+        self.upload(rows, columns)
+        return self.api.start_import(self.map_file, self.source_file)
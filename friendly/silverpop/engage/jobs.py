@@ -0,0 +1,262 @@
+"""Handles of Engage's background jobs and the loop polling their status."""
+
+import heapq
+import itertools
+import logging
+import random
+import socket
+import sys
+import threading
+import time
+import requests
+from .concurrency import Future, TimeoutError
+from .constants import JOB_STATUS_COMPLETE, JOB_STATUS_FINISHED
+from .exceptions import JobFailedError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLL_INTERVAL = 1
+DEFAULT_MAX_POLL_INTERVAL = 60
+
+# Errors of a poll after which the job is polled again
+TRANSIENT_ERRORS = (requests.RequestException, socket.error)
+
+
+class Job(object):
+    """Background job started by a request, e.g. ``ExportList`` or ``ImportList``.
+
+    Example::
+
+        job = api.export_list(database, EXPORT_TYPE_ALL, EXPORT_FORMAT_CSV)
+        job.wait(timeout=600)
+        download(job.file_path)
+
+    Args:
+        api (EngageApi): Client which started the job
+        job_id (int): Id of the job
+        kwargs: Further details of the job, e.g. ``file_path``, which are set as attributes
+    """
+
+    def __init__(self, api, job_id, **kwargs):
+        self.api = api
+        self.id = int(job_id)
+        self.status = None  # JOB_STATUS_* as of the last poll
+        self.description = None
+        for name, value in kwargs.iteritems():
+            setattr(self, name, value)
+
+    def __repr__(self):
+        return "<Job '{0}'>".format(self.id)
+
+    @property
+    def finished(self):
+        """Wether the job was finished (completed, failed or canceled) as of the last poll"""
+        return self.status in JOB_STATUS_FINISHED
+
+    def poll(self):
+        """Fetches the status of the job
+
+        Returns:
+            str -- Status of the job
+        """
+        (self.status, self.description) = self.api.get_job_status(self.id)
+        return self.status
+
+    def done(self):
+        """Returns wether the job has finished. Asks Engage unless it's known already."""
+        if not self.finished:
+            self.poll()
+        return self.finished
+
+    def done_async(self):
+        """Returns a ``Future`` of ``done()``"""
+        return self.api.job_poller.submit(self.done)
+
+    def wait(self, timeout=None):
+        """Waits until the job has finished.
+
+        The status is polled by the client's shared ``JobPoller``. Once every
+        waiter has timed out, the job isn't polled anymore until it's waited for again.
+
+        Returns:
+            Job -- The job itself
+
+        Raises:
+            JobFailedError -- If the job failed or was canceled
+            TimeoutError -- If the job didn't finish within ``timeout`` seconds
+        """
+        poller = self.api.job_poller
+        future = poller.watch(self)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            poller.unwatch(self)
+            raise
+
+    def wait_async(self):
+        """Returns a ``Future`` of ``wait()``. The job is polled until it has finished."""
+        return self.api.job_poller.watch(self)
+
+    def raise_for_status(self):
+        if self.finished and self.status != JOB_STATUS_COMPLETE:
+            raise JobFailedError('Job {0} finished with status {1}: {2}'.format(
+                self.id, self.status, self.description), self.status)
+
+
+class JobPoller(threading.Thread):
+    """Single background thread which polls the status of many jobs.
+
+    Each job is polled after ``interval`` seconds first. The interval
+    grows exponentially up to ``max_interval`` while the job is running
+    and is jittered, so jobs started together don't poll together.
+
+    Args:
+        interval (float): Seconds until the first poll of a job
+        max_interval (float): Maximum number of seconds between two polls of a job
+        factor (float): Growth of the interval after each poll
+        jitter (float): Fraction of the interval which is randomized, between 0 and 1
+    """
+
+    def __init__(self, interval=DEFAULT_POLL_INTERVAL, max_interval=DEFAULT_MAX_POLL_INTERVAL, factor=2, jitter=0.5):
+        super(JobPoller, self).__init__(name='engage-job-poller')
+        self.daemon = True
+        self.interval = interval
+        self.max_interval = max_interval
+        self.factor = factor
+        self.jitter = jitter
+
+        self._condition = threading.Condition()
+        self._queue = []  # Heap of (due, sequence, job or call, interval, future)
+        self._sequence = itertools.count()
+        self._watched = {}  # [future, number of waiters] by job id
+        self._stopped = False
+
+    def delay(self, interval):
+        """Returns the jittered delay of a poll after ``interval`` seconds"""
+        return interval * (1 - self.jitter * random.random())
+
+    def watch(self, job):
+        """Polls the job until it has finished
+
+        Returns:
+            Future -- Future of the job, which raises ``JobFailedError`` if it failed
+        """
+        with self._condition:
+            self._check_running()
+            watched = self._watched.get(job.id)
+            if watched is not None:
+                watched[1] += 1
+                return watched[0]
+
+            future = Future()
+            self._watched[job.id] = [future, 1]
+            if job.finished:
+                self._schedule(0, job, 0, future)
+            else:
+                self._schedule(self.delay(self.interval), job, self.interval, future)
+        return future
+
+    def unwatch(self, job):
+        """Releases a waiter of the job. The job isn't polled anymore once all waiters are released."""
+        with self._condition:
+            watched = self._watched.get(job.id)
+            if watched is not None:
+                watched[1] -= 1
+                if watched[1] <= 0:
+                    del self._watched[job.id]
+
+    def _is_watched(self, job, future):
+        with self._condition:
+            watched = self._watched.get(job.id)
+            return watched is not None and watched[0] is future
+
+    def _forget(self, job, future):
+        with self._condition:
+            if self._is_watched(job, future):
+                del self._watched[job.id]
+
+    def submit(self, fn, *args, **kwargs):
+        """Calls ``fn(*args, **kwargs)`` on the polling thread and returns a ``Future`` of its result"""
+        future = Future()
+        with self._condition:
+            self._check_running()
+            self._schedule(0, lambda: fn(*args, **kwargs), None, future)
+        return future
+
+    def _check_running(self):
+        if self._stopped:
+            raise RuntimeError('The job poller has been stopped')
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+
+    def _schedule(self, delay, item, interval, future):
+        # Called with the condition held. Items scheduled after ``stop`` fail once the loop has ended.
+        heapq.heappush(self._queue, (time.time() + delay, next(self._sequence), item, interval, future))
+        self._condition.notify()
+
+    def run(self):
+        while True:
+            with self._condition:
+                while not self._stopped:
+                    now = time.time()
+                    if self._queue and self._queue[0][0] <= now:
+                        break
+                    self._condition.wait(self._queue[0][0] - now if self._queue else None)
+                if self._stopped:
+                    queue, self._queue = self._queue, []
+                    self._watched.clear()
+                    break
+                (due, sequence, item, interval, future) = heapq.heappop(self._queue)
+
+            if isinstance(item, Job):
+                self._poll(item, interval, future)
+            else:
+                self._call(item, future)
+
+        for (due, sequence, item, interval, future) in queue:
+            try:
+                raise RuntimeError('The job poller has been stopped')
+            except RuntimeError:
+                future.set_exception(sys.exc_info())
+
+    def _call(self, fn, future):
+        try:
+            result = fn()
+        except BaseException:
+            future.set_exception(sys.exc_info())
+        else:
+            future.set_result(result)
+
+    def _poll(self, job, interval, future):
+        if not self._is_watched(job, future):
+            return  # All waiters timed out
+
+        try:
+            finished = job.finished or job.done()
+        except TRANSIENT_ERRORS:
+            logger.exception('Polling the status of job %s failed', job.id)
+            finished = False
+        except Exception:
+            # Faults and unexpected responses won't go away by polling again
+            self._forget(job, future)
+            future.set_exception(sys.exc_info())
+            return
+
+        if not finished:
+            interval = min(interval * self.factor, self.max_interval)
+            with self._condition:
+                if self._is_watched(job, future):
+                    self._schedule(self.delay(interval), job, interval, future)
+            return
+
+        self._forget(job, future)
+
+        try:
+            job.raise_for_status()
+        except JobFailedError:
+            future.set_exception(sys.exc_info())
+        else:
+            future.set_result(job)
@@ -0,0 +1,265 @@
+"""Parsing of Engage responses."""
+
+import threading
+from collections import namedtuple
+from xml.etree.ElementTree import fromstring, iterparse, tostring
+from .exceptions import EngageError
+
+try:
+    from lxml import etree as lxml_etree
+except ImportError:
+    lxml_etree = None
+
+PARSER_AUTO = 'auto'
+PARSER_LXML = 'lxml'
+PARSER_STDLIB = 'stdlib'
+
+
+class Fault(namedtuple('Fault', ('code', 'message', 'error_id'))):
+    """Fault of a failed request"""
+    __slots__ = ()
+
+
+class Result(namedtuple('Result', ('success', 'tree', 'error'))):
+    """Immutable outcome of a request.
+
+    Unpacks like a ``(success, tree, error)`` tuple. ``error`` is a ``Fault``
+    or ``None`` if the request was successful.
+    """
+    __slots__ = ()
+
+    @property
+    def fault_code(self):
+        return self.error.code if self.error is not None else None
+
+    @property
+    def fault_string(self):
+        return self.error.message if self.error is not None else None
+
+    @property
+    def error_id(self):
+        return self.error.error_id if self.error is not None else None
+
+
+class RowResult(namedtuple('RowResult', ('row_id', 'success', 'recipient_id', 'error'))):
+    """Outcome of a single row of a bulk request. ``error`` is a ``Fault`` or ``None``."""
+    __slots__ = ()
+
+    @property
+    def fault_code(self):
+        return self.error.code if self.error is not None else None
+
+    @property
+    def fault_string(self):
+        return self.error.message if self.error is not None else None
+
+    @property
+    def error_id(self):
+        return self.error.error_id if self.error is not None else None
+
+
+def parse_fault(el):
+    """Extracts the ``Fault`` from a ``Fault`` element"""
+    error_id = el.findtext('detail/error/errorid')
+    return Fault(el.findtext('FaultCode'), el.findtext('FaultString'),
+                 int(error_id) if error_id is not None else None)
+
+
+# Depth of the RESULT and Fault elements within Envelope/Body
+_BODY_CHILD_DEPTH = 3
+
+
+class ResponseStream(object):
+    """Response which is parsed incrementally from its raw bytes.
+
+    The state of the request is known as soon as ``SUCCESS`` (and the
+    ``Fault`` of failed requests) has been parsed. Iterating the stream
+    yields the remaining children of ``RESULT`` one by one as they arrive.
+    Each element is cleared once the next one is requested, so keep what
+    you need before moving on.
+
+    Args:
+        source: File-like object to parse
+        response: HTTP response which is closed once the stream is exhausted
+        iterparse: ``iterparse`` function of the parser backend
+    """
+
+    tree = None
+
+    def __init__(self, source, response=None, iterparse=iterparse):
+        self._response = response
+        self._events = iterparse(source, events=('start', 'end'))
+        self._depth = 0
+        self._result_el = None
+        self._in_result = False
+        self._pending = []  # Children of RESULT completed before SUCCESS
+
+        self.success = None
+        self.error = None
+        self._read_status()
+
+    @property
+    def fault_code(self):
+        return self.error.code if self.error is not None else None
+
+    @property
+    def fault_string(self):
+        return self.error.message if self.error is not None else None
+
+    @property
+    def error_id(self):
+        return self.error.error_id if self.error is not None else None
+
+    def _result_children(self):
+        """Yields the completed children of RESULT and Fault elements"""
+        for event, el in self._events:
+            if event == 'start':
+                self._depth += 1
+                if self._depth == _BODY_CHILD_DEPTH and el.tag == 'RESULT':
+                    self._result_el = el
+                    self._in_result = True
+                continue
+
+            self._depth -= 1
+            if self._depth == _BODY_CHILD_DEPTH and self._in_result:
+                yield el
+            elif self._depth == _BODY_CHILD_DEPTH - 1:
+                if el.tag == 'RESULT':
+                    self._in_result = False
+                elif el.tag == 'Fault':
+                    yield el
+
+    def _read_status(self):
+        for el in self._result_children():
+            if el.tag == 'SUCCESS':
+                self.success = (el.text or '').strip().upper() == 'TRUE'
+                break
+            self._pending.append(el)
+        else:
+            self.close()
+            raise EngageError('Response without SUCCESS')
+
+        if not self.success:
+            for el in self._result_children():
+                if el.tag == 'Fault':
+                    self.error = parse_fault(el)
+                    break
+            self.close()
+
+    def __iter__(self):
+        pending, self._pending = self._pending, []
+        for el in pending:
+            yield el
+
+        if not self.success:
+            return
+
+        try:
+            for el in self._result_children():
+                if el.tag == 'Fault':
+                    continue
+                yield el
+                el.clear()
+                self._result_el.remove(el)
+        finally:
+            self.close()
+
+    def iterfind(self, tag):
+        """Yields the children of RESULT with the given tag"""
+        for el in self:
+            if el.tag == tag:
+                yield el
+
+    def close(self):
+        """Releases the connection of the response"""
+        if self._response is not None:
+            self._response.close()
+            self._response = None
+
+
+class StdlibParser(object):
+    """Parser backend using ``xml.etree.ElementTree``, which caches compiled paths itself"""
+
+    name = PARSER_STDLIB
+
+    def fromstring(self, data):
+        return fromstring(data)
+
+    def tostring(self, el):
+        return tostring(el, encoding='utf-8')
+
+    def iterparse(self, source, events):
+        return iterparse(source, events=events)
+
+    def find(self, el, path):
+        return el.find(path)
+
+    def findall(self, el, path):
+        return el.findall(path)
+
+
+class LxmlParser(object):
+    """Parser backend using lxml. Paths are compiled into ``XPath`` objects once per thread.
+
+    Entities aren't resolved and nothing is fetched from the network.
+    """
+
+    name = PARSER_LXML
+
+    def __init__(self):
+        if lxml_etree is None:
+            raise ImportError('lxml is not installed')
+
+        self._local = threading.local()  # lxml parsers and XPath objects mustn't be shared by threads
+
+    def _state(self):
+        state = getattr(self._local, 'state', None)
+        if state is None:
+            parser = lxml_etree.XMLParser(resolve_entities=False, no_network=True)
+            state = self._local.state = (parser, {})
+        return state
+
+    def _xpath(self, path):
+        parser, paths = self._state()
+        xpath = paths.get(path)
+        if xpath is None:
+            xpath = paths[path] = lxml_etree.XPath(path)
+        return xpath
+
+    def fromstring(self, data):
+        parser, paths = self._state()
+        return lxml_etree.fromstring(data, parser)
+
+    def tostring(self, el):
+        return lxml_etree.tostring(el, encoding='utf-8')
+
+    def iterparse(self, source, events):
+        return lxml_etree.iterparse(source, events=events, resolve_entities=False, no_network=True)
+
+    def find(self, el, path):
+        found = self._xpath(path)(el)
+        return found[0] if found else None
+
+    def findall(self, el, path):
+        return self._xpath(path)(el)
+
+
+def get_parser(name=PARSER_AUTO):
+    """Returns the parser backend with the given name.
+
+    Args:
+        name (str): ``lxml``, ``stdlib`` or ``auto`` to use lxml if it is installed
+
+    Raises:
+        ImportError -- If lxml is requested but not installed
+    """
+    if name == PARSER_AUTO:
+        name = PARSER_LXML if lxml_etree is not None else PARSER_STDLIB
+
+    if name == PARSER_LXML:
+        return LxmlParser()
+
+    if name == PARSER_STDLIB:
+        return StdlibParser()
+
+    raise ValueError('Unknown parser: %r' % name)
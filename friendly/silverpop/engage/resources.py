@@ -1,4 +1,5 @@
-from friendly.silverpop.helpers import to_python, pep_up
+import time
+from friendly.silverpop.helpers import compile_extractor, pep_up
 from .constants import (
     LIST_TYPE_DATABASE,
     LIST_TYPE_QUERY,
@@ -10,7 +11,43 @@ from .constants import (
     CONTACT_CREATED_MANUALLY)
 
 
+class VariantMeta(type):
+    """Lets compact variants pass ``isinstance`` checks of the class they mirror (``_variant_of``)"""
+
+    def __instancecheck__(cls, instance):
+        if type.__instancecheck__(cls, instance):
+            return True
+
+        variant_of = getattr(type(instance), '_variant_of', None)
+        return variant_of is not None and issubclass(variant_of, cls)
+
+
+def slots_for(resource, *extra):
+    """Returns the ``__slots__`` holding the attributes which are extracted for ``resource``"""
+    keys = []
+    for key_list in (resource._str_keys, resource._int_keys, resource._date_keys, resource._bool_keys,
+                     resource._dict_keys):
+        keys.extend(key.lower() for key in key_list or ())
+    return tuple(keys) + extra
+
+
+class ResourceMeta(VariantMeta):
+    """Compiles the element extractor of each resource class once, when the class is created"""
+
+    def __init__(cls, name, bases, attrs):
+        super(ResourceMeta, cls).__init__(name, bases, attrs)
+        cls._extract = staticmethod(compile_extractor(
+            str_keys=cls._str_keys,
+            int_keys=cls._int_keys,
+            date_keys=cls._date_keys,
+            bool_keys=cls._bool_keys,
+            dict_keys=cls._dict_keys))
+
+
 class Resource(object):
+    __metaclass__ = ResourceMeta
+    __slots__ = ()
+
     _str_keys = []
     _int_keys = []
     _date_keys = []
@@ -20,29 +57,64 @@ class Resource(object):
     # _pks = []
 
     @classmethod
-    def from_element(cls, el, api):
-        return to_python(
-            obj=cls(),
-            in_el=el,
-            str_keys=cls._str_keys,
-            int_keys=cls._int_keys,
-            date_keys=cls._date_keys,
-            bool_keys=cls._bool_keys,
-            dict_keys=cls._dict_keys,
-            object_map=cls._object_map,
-            api=api
-        )
+    def from_element(cls, el, api, keep_element=True):
+        """Builds the resource from an element.
+
+        Args:
+            keep_element (bool): Wether to keep ``el`` as ``in_el``. Pass ``False`` for elements
+                which are cleared afterwards, ``in_el`` is ``None`` then.
+        """
+        return cls._extract(cls(), el, in_el=el if keep_element else None, api=api)
+
+
+class CompactResource(Resource):
+    """Resource which keeps its attributes in ``__slots__`` instead of a ``__dict__``.
+
+    Compact resources have the same public attributes as the class they
+    mirror and pass its ``isinstance`` checks, but they don't keep the
+    element they were extracted from (``in_el``).
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_element(cls, el, api, keep_element=True):
+        return cls._extract(cls(), el, api=api)
 
 
 class Session(object):
     def __init__(self, session_id):
         self.id = session_id
+        self.created_at = time.time()
+        self.last_used_at = self.created_at
+        self.closed = False
 
     def __str__(self):
         return self.id
 
+    @property
+    def age(self):
+        """Seconds since the session was logged in"""
+        return time.time() - self.created_at
+
+    @property
+    def idle_time(self):
+        """Seconds since the session was used the last time"""
+        return time.time() - self.last_used_at
+
+    def touch(self):
+        """Marks the session as used"""
+        self.last_used_at = time.time()
+
+    def expires_in(self, timeout):
+        """Seconds until Engage expires the session if it stays idle.
+
+        Args:
+            timeout (float): Seconds of inactivity after which Engage expires a session
+        """
+        return timeout - self.idle_time
+
     def close(self):
-        pass
+        self.closed = True
 
 
 class Mailing(object):
@@ -50,31 +122,51 @@ class Mailing(object):
 
 
 class Table(object):
+    """Columns of a list, accessible by their normalized id and by their original Engage name"""
+
     def __init__(self):
-        self._columns = {}
+        self._columns = {}  # Columns by id
+        self._names = {}  # Columns by their original name
+        self._key_columns = None
+        self._column_names = None
+        self._positions = {}  # Positions of the columns by id. Dropped columns keep theirs.
 
     @property
     def key_columns(self):
-        """Returns a list of key columns of the table"""
-        return [str(column) for id, column in self._columns.iteritems() if column.is_key]
+        """Returns a tuple of key columns of the table"""
+        if self._key_columns is None:
+            self._key_columns = tuple(str(column) for id, column in self._columns.iteritems() if column.is_key)
+        return self._key_columns
 
     @property
     def column_names(self):
-        return [str(column) for id, column in self._columns.iteritems()]
+        if self._column_names is None:
+            self._column_names = tuple(str(column) for id, column in self._columns.iteritems())
+        return self._column_names
 
     def has_column(self, column_name):
         """Checks wether the table contains the given column
 
         Args:
-            column_name (str): Name of the column to check for
+            column_name (str): Id or original name of the column to check for
 
         Returns:
             bool -- Wether the column exists or not
         """
-        return column_name in self._columns
+        return column_name in self._columns or column_name in self._names
+
+    def get_column(self, column_name, default=None):
+        """Returns the column with the given id or original name"""
+        column = self._columns.get(column_name)
+        if column is None:
+            column = self._names.get(column_name, default)
+        return column
 
     def __getitem__(self, key):
-        return self._columns[key]
+        column = self.get_column(key)
+        if column is None:
+            raise KeyError(key)
+        return column
 
     def add_column(self, column, replace=False, **kwargs):
         """Adds/replaces a column at the table
@@ -97,7 +189,19 @@ class Table(object):
             # raise Exception('Column "{0}" already exists'.format(str(column)))
             return
 
+        previous = self._columns.get(str(column))
+        if previous is not None:
+            self._names.pop(previous.name, None)
+
         self._columns[str(column)] = column
+        self._names[column.name] = column
+        self._positions.setdefault(str(column), len(self._positions))
+        self._invalidate()
+
+    def position_of(self, column_name):
+        """Returns the stable position of a column, as used by compact contacts, or ``None``"""
+        column = self.get_column(column_name)
+        return self._positions[str(column)] if column is not None else None
 
     def drop_column(self, column):
         column_name = None
@@ -109,13 +213,23 @@ class Table(object):
         else:
             raise ValueError('Invalid column type')
 
-        if not column_name in self.column_names:
+        column = self.get_column(column_name)
+        if column is None:
             raise Exception('No column %s' % column_name)
 
-        if self._columns[column_name].is_key:
+        if column.is_key:
             raise Exception('Cannot delete key columns')
 
-        del self._columns[column_name]
+        del self._columns[str(column)]
+        del self._names[column.name]
+        self._invalidate()
+
+    def _invalidate(self):
+        self._key_columns = None
+        self._column_names = None
+
+
+_UNSET = object()  # Marks columns of compact contacts which haven't been set
 
 
 class Contact(Resource):
@@ -144,7 +258,71 @@ class Contact(Resource):
         super(Contact, self).__setattr__(name, value)
 
 
-class List(Resource):
+class CompactContact(CompactResource):
+    """Slotted variant of ``Contact``.
+
+    The columns of the table are kept in a list which is indexed by
+    ``Table.position_of`` instead of a ``__dict__``.
+    """
+    __slots__ = slots_for(Contact, 'api', '_table', '_values')
+    _variant_of = Contact
+    _str_keys = Contact._str_keys
+    _int_keys = Contact._int_keys
+    _date_keys = Contact._date_keys
+    _bool_keys = Contact._bool_keys
+    _dict_keys = Contact._dict_keys
+
+    def __init__(self, **kwargs):
+        object.__setattr__(self, '_table', kwargs.get('from_table'))
+        object.__setattr__(self, '_values', None)
+
+    def __setattr__(self, name, value):
+        table = self._table
+        if table and not table.has_column(name):
+            raise ValueError(
+                'Contact has no field "{0}". Available fields: {1}'.format(name, ', '.join(table.column_names)))
+
+        if name in CompactContact.__slots__ or table is None:
+            object.__setattr__(self, name, value)
+            return
+
+        position = table.position_of(name)
+        values = self._values
+        if values is None:
+            values = []
+            object.__setattr__(self, '_values', values)
+        if position >= len(values):
+            values.extend([_UNSET] * (position + 1 - len(values)))
+        values[position] = value
+
+    def __getattr__(self, name):
+        # Only called for attributes which aren't set in a slot
+        if name not in CompactContact.__slots__:
+            table, values = self._table, self._values
+            if table is not None and values is not None and table.has_column(name):
+                position = table.position_of(name)
+                if position < len(values) and values[position] is not _UNSET:
+                    return values[position]
+        raise AttributeError(name)
+
+
+class ListMixin(object):
+    __slots__ = ()
+
+    def add_contact(self, contact, created_from=CONTACT_CREATED_MANUALLY):
+        if not isinstance(contact, Contact):
+            raise ValueError('Invalid contact')
+
+        return self.api.add_recipient(self.id, created_from, contact)
+
+    def get_recipient_data(self, contact):
+        if not isinstance(contact, Contact):
+            raise ValueError('Invalid contact')
+
+        return self.api.select_recipient_data(self.id, contact.email)
+
+
+class List(Resource, ListMixin):
     _str_keys = ('NAME', 'PARENT_NAME', 'USER_ID')
     _int_keys = ('ID', 'TYPE', 'SIZE', 'NUM_OPT_OUTS', 'NUM_UNDELIVERABLE', 'VISIBILITY',
                  'PARENT_FOLDER_ID', 'SUPPRESSION_LIST_ID')
@@ -157,27 +335,15 @@ class List(Resource):
     #        self._contacts = {}
 
     @classmethod
-    def from_element(cls, el, api):
-        type = int(el.find('TYPE').text)
+    def from_element(cls, el, api, keep_element=True):
+        type = int(el.findtext('TYPE'))
 
         if not type in LIST_TYPE_MAP:
             raise Exception("Unsupported type %d", type)
 
         list_class = LIST_TYPE_MAP[type]
 
-        return super(cls, list_class).from_element(el, api)
-
-    def add_contact(self, contact, created_from=CONTACT_CREATED_MANUALLY):
-        if not isinstance(contact, Contact):
-            raise ValueError('Invalid contact')
-
-        return self.api.add_recipient(self.id, created_from, contact)
-
-    def get_recipient_data(self, contact):
-        if not isinstance(contact, Contact):
-            raise ValueError('Invalid contact')
-
-        return self.api.select_recipient_data(self.id, contact.email)
+        return super(cls, list_class).from_element(el, api, keep_element)
 
 
 # if not contact.id in self._contacts:
@@ -185,11 +351,41 @@ class List(Resource):
 
 #Column = collections.namedtuple('Column', ["title", "url", "dateadded", "format", "owner", "sizes", "votes"])
 class MetaDataMixin(object):
+    __slots__ = ()
+
+    # Extracted from the result of ``GetListMetaData``
+    _meta_str_keys = ('ORGANIZATION_ID', )
+    _meta_date_keys = ('LAST_CONFIGURED', 'CREATED')
+    _meta_bool_keys = ('OPT_IN_FORM_DEFINED', 'OPT_OUT_FORM_DEFINED', 'PROFILE_FORM_DEFINED',
+                       'OPT_IN_AUTOREPLY_DEFINED', 'PROFILE_AUTOREPLY_DEFINED')
+
     def get_meta_data(self):
         return self.api.get_list_meta_data(self)
 
 
+class DatabaseMixin(MetaDataMixin):
+    __slots__ = ()
+
+    _contact_class = Contact
+
+    def create_contact(self):
+        """Creates a new contact.
+
+        Returns:
+            Contact -- A new instance of a Contact.
+
+            NOTE: The instance acts only as a DTO and won't be persistet
+                  until calling ``add_contact``.
+        """
+        if not hasattr(self, '_table'):
+            self.get_meta_data()
+
+        return self._contact_class(from_table=self._table)
+
+
 class Column(object):
+    __metaclass__ = VariantMeta
+
     def __init__(self, column_name, column_type=None, default_value=None, **kwargs):
         self._mapping = {}  # Map for remembering old and ugly column names
 
@@ -209,23 +405,27 @@ class Column(object):
         return "<Column name={0} type={1}>".format(self.name, self.type)
 
 
-class Database(List, MetaDataMixin):
-    def __repr__(self):
-        return "<Database '{0}' '{1}'>".format(self.id, self.name)
+class CompactColumn(object):
+    """Slotted variant of ``Column`` without the name mapping"""
+    __metaclass__ = VariantMeta
+    __slots__ = ('id', 'name', 'type', 'default', 'is_key')
+    _variant_of = Column
 
-    def create_contact(self):
-        """Creates a new contact.
+    def __init__(self, column_name, column_type=None, default_value=None, **kwargs):
+        self.id = pep_up(column_name)
+        self.name = column_name
+        self.type = int(column_type) if column_type else None
+        self.default = default_value
 
-        Returns:
-            Contact -- A new instance of a Contact.
+        self.is_key = kwargs.get('is_key', False)
+
+    __str__ = Column.__dict__['__str__']
+    __repr__ = Column.__dict__['__repr__']
 
-            NOTE: The instance acts only as a DTO and won't be persistet
-                  until calling ``add_contact``.
-        """
-        if not hasattr(self, '_table'):
-            self.get_meta_data()
 
-        return Contact(from_table=self._table)
+class Database(List, DatabaseMixin):
+    def __repr__(self):
+        return "<Database '{0}' '{1}'>".format(self.id, self.name)
 
 
 class Query(List, MetaDataMixin):
@@ -270,6 +470,52 @@ class ContactList(List):
         return "<ContactList '{0}' '{1}'>".format(self.id, self.name)
 
 
+class CompactList(CompactResource, ListMixin):
+    """Slotted variant of ``List``. Types without a compact variant of their own are hydrated as ``CompactList``."""
+    __slots__ = slots_for(List, 'api')
+    _variant_of = List
+    _str_keys = List._str_keys
+    _int_keys = List._int_keys
+    _date_keys = List._date_keys
+    _bool_keys = List._bool_keys
+    _dict_keys = List._dict_keys
+
+    @classmethod
+    def from_element(cls, el, api, keep_element=True):
+        type = int(el.findtext('TYPE'))
+
+        if not type in LIST_TYPE_MAP:
+            raise Exception("Unsupported type %d", type)
+
+        list_class = COMPACT_LIST_TYPE_MAP.get(type, CompactList)
+
+        return super(CompactList, list_class).from_element(el, api, keep_element)
+
+    def __repr__(self):
+        return "<{0} '{1}' '{2}'>".format(type(self).__name__, self.id, self.name)
+
+
+# Slots of the attributes set by ``get_list_meta_data``
+_META_DATA_SLOTS = tuple(key.lower() for key in MetaDataMixin._meta_str_keys + MetaDataMixin._meta_date_keys +
+                         MetaDataMixin._meta_bool_keys) + ('_table', )
+
+
+class CompactDatabase(CompactList, DatabaseMixin):
+    __slots__ = _META_DATA_SLOTS
+    _variant_of = Database
+    _contact_class = CompactContact
+
+
+class CompactQuery(CompactList, MetaDataMixin):
+    __slots__ = _META_DATA_SLOTS
+    _variant_of = Query
+
+
+class CompactRelationalTable(CompactList, MetaDataMixin):
+    __slots__ = _META_DATA_SLOTS
+    _variant_of = RelationalTable
+
+
 LIST_TYPE_MAP = {
     LIST_TYPE_DATABASE: Database,
     LIST_TYPE_QUERY: Query,
@@ -279,3 +525,9 @@ LIST_TYPE_MAP = {
     LIST_TYPE_RELATIONAL_TABLE: RelationalTable,
     LIST_TYPE_CONTACT_LIST: ContactList,
 }
+
+COMPACT_LIST_TYPE_MAP = {
+    LIST_TYPE_DATABASE: CompactDatabase,
+    LIST_TYPE_QUERY: CompactQuery,
+    LIST_TYPE_RELATIONAL_TABLE: CompactRelationalTable,
+}
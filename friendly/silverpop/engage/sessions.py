@@ -0,0 +1,200 @@
+"""Pool of Engage sessions which are leased to concurrent callers."""
+
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from .exceptions import EngageError
+
+logger = logging.getLogger(__name__)
+
+
+class SessionPool(object):
+    """Logs in up to ``size`` sessions of one account and leases them to callers.
+
+    Sessions are logged in lazily when no idle session is available and the
+    cap hasn't been reached yet. Callers wait for a released session
+    otherwise. Expired sessions are discarded and replaced on demand.
+
+    Args:
+        api (EngageApiCore): Client used to log the sessions in and out
+        size (int): Maximum number of sessions
+        max_idle (float): Idle sessions unused for this many seconds are considered expired
+            and aren't leased anymore. ``None`` keeps them.
+    """
+
+    def __init__(self, api, size, max_idle=None):
+        if size < 1:
+            raise ValueError('A session pool needs at least one session')
+
+        self._api = api
+        self.size = size
+        self.max_idle = max_idle
+
+        self._idle = deque()
+        self._leased = set()
+        self._count = 0  # Sessions which are logged in or logging in
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def idle(self):
+        """Number of sessions which aren't leased"""
+        return len(self._idle)
+
+    def acquire(self, timeout=None):
+        """Leases a session. Logs in a new one if none is idle and the cap isn't reached.
+
+        Args:
+            timeout (float): Seconds to wait for a released session. ``None`` waits forever.
+
+        Raises:
+            EngageError -- If the pool is closed, no session became available or the login failed
+        """
+        deadline = time.time() + timeout if timeout is not None else None
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise EngageError('Session pool is closed')
+
+                while self._idle:
+                    session = self._idle.popleft()
+                    if self.max_idle is not None and session.idle_time >= self.max_idle:
+                        # Engage has expired the session already
+                        self._count -= 1
+                        session.close()
+                        continue
+                    self._leased.add(session)
+                    return session
+
+                if self._count < self.size:
+                    self._count += 1
+                    break
+
+                remaining = deadline - time.time() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    raise EngageError('No session available')
+                self._cond.wait(remaining)
+
+        # Log in without holding the lock, other callers may release sessions meanwhile
+        try:
+            session = self._api.create_session()
+        except BaseException:
+            self._forget()
+            raise
+
+        if session is None:
+            self._forget()
+            raise EngageError('No Session')
+
+        with self._cond:
+            self._leased.add(session)
+        return session
+
+    def release(self, session):
+        """Returns a leased session to the pool"""
+        with self._cond:
+            self._leased.discard(session)
+            if not self._closed:
+                self._idle.append(session)
+                self._cond.notify()
+                return
+            self._count -= 1
+
+        self._api.close_session(session)
+
+    def discard(self, session):
+        """Drops a leased session which expired. A new one is logged in when needed."""
+        with self._cond:
+            if session in self._leased:
+                self._leased.discard(session)
+                self._count -= 1
+                self._cond.notify()
+
+    @contextmanager
+    def lease(self, timeout=None):
+        """Leases a session for the duration of the block"""
+        session = self.acquire(timeout)
+        try:
+            yield session
+        finally:
+            if session in self._leased:
+                self.release(session)
+
+    def prefill(self, count=None):
+        """Logs in ``count`` sessions (all of them by default) up front"""
+        count = self.size if count is None else min(count, self.size)
+        sessions = [self.acquire() for _ in range(max(count - self._count, 0))]
+        for session in sessions:
+            self.release(session)
+
+    def close(self):
+        """Logs out the idle sessions. Leased sessions are logged out when they're released."""
+        with self._cond:
+            self._closed = True
+            sessions = list(self._idle)
+            self._idle.clear()
+            self._count -= len(sessions)
+            self._cond.notify_all()
+
+        for session in sessions:
+            self._api.close_session(session)
+
+    def refresh(self, is_stale):
+        """Replaces idle sessions for which ``is_stale(session)`` is true with fresh ones"""
+        with self._cond:
+            stale = [session for session in self._idle if is_stale(session)]
+            for session in stale:
+                self._idle.remove(session)
+                self._leased.add(session)
+
+        for session in stale:
+            # Log in the replacement first so callers don't have to wait for a login
+            try:
+                fresh = self._api.create_session()
+            except Exception:
+                fresh = None
+
+            with self._cond:
+                self._leased.discard(session)
+                if fresh is not None and not self._closed:
+                    self._idle.append(fresh)
+                    fresh = None
+                else:
+                    self._count -= 1
+                self._cond.notify()
+
+            self._api.close_session(session)
+            if fresh is not None:
+                self._api.close_session(fresh)
+
+    def _forget(self):
+        with self._cond:
+            self._count -= 1
+            self._cond.notify()
+
+
+class SessionKeeper(threading.Thread):
+    """Background thread which refreshes the sessions of a client before they expire"""
+
+    def __init__(self, api, interval):
+        super(SessionKeeper, self).__init__(name='engage-session-keeper')
+        self.daemon = True
+        self._api = api
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self._api.refresh_sessions()
+            except Exception:
+                logger.exception('Refreshing Engage sessions failed')
+
+    def stop(self):
+        self._stopped.set()
@@ -0,0 +1,109 @@
+"""Persistent store of list catalogs and schemas which outlives the process."""
+
+import json
+import sqlite3
+import threading
+import time
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS catalogs ('
+    '  visibility INTEGER NOT NULL,'
+    '  list_type INTEGER NOT NULL,'
+    '  fetched_at REAL NOT NULL,'
+    '  data TEXT NOT NULL,'
+    '  PRIMARY KEY (visibility, list_type))',
+    'CREATE TABLE IF NOT EXISTS meta_data ('
+    '  list_id TEXT NOT NULL PRIMARY KEY,'
+    '  fetched_at REAL NOT NULL,'
+    '  data BLOB NOT NULL)',
+)
+
+
+class SQLiteStore(object):
+    """Keeps list catalogs and ``GetListMetaData`` results in a SQLite database.
+
+    Workers sharing the file start with the catalogs and schemas fetched by
+    their predecessors instead of fetching them again. Entries are
+    revalidated lazily by the caches which use the store.
+
+    Args:
+        path (str): Path of the database file. ``:memory:`` keeps it in memory.
+        max_age (float): Entries older than this many seconds are ignored. ``None`` uses all of them.
+    """
+
+    def __init__(self, path, max_age=None):
+        self.path = path
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            for statement in SCHEMA:
+                self._connection.execute(statement)
+            self._connection.commit()
+
+    def _fetch(self, query, args):
+        with self._lock:
+            row = self._connection.execute(query, args).fetchone()
+
+        if row is None:
+            return None
+
+        fetched_at, data = row
+        if self.max_age is not None and time.time() - fetched_at >= self.max_age:
+            return None
+        return fetched_at, data
+
+    def _execute(self, query, args):
+        with self._lock:
+            self._connection.execute(query, args)
+            self._connection.commit()
+
+    def load_catalog(self, visibility, list_type):
+        """Returns the stored ``(fields, fetched_at)`` of a catalog or ``None``.
+
+        ``fields`` is what ``ListCatalog.to_dict`` returned.
+        """
+        row = self._fetch('SELECT fetched_at, data FROM catalogs WHERE visibility = ? AND list_type = ?',
+                          (visibility, list_type))
+        if row is None:
+            return None
+
+        fetched_at, data = row
+        return json.loads(data), fetched_at
+
+    def save_catalog(self, visibility, list_type, fields, fetched_at=None):
+        self._execute('INSERT OR REPLACE INTO catalogs (visibility, list_type, fetched_at, data) VALUES (?, ?, ?, ?)',
+                      (visibility, list_type, fetched_at or time.time(), json.dumps(fields)))
+
+    def delete_catalog(self, visibility=None, list_type=None):
+        """Deletes the stored catalogs of the given visibility and list type. ``None`` matches any."""
+        conditions = [(column, value) for column, value in (('visibility', visibility), ('list_type', list_type))
+                      if value is not None]
+        query = 'DELETE FROM catalogs'
+        if conditions:
+            query += ' WHERE ' + ' AND '.join('%s = ?' % column for column, value in conditions)
+        self._execute(query, tuple(value for column, value in conditions))
+
+    def load_meta_data(self, list_id):
+        """Returns the stored ``(data, fetched_at)`` of a ``RESULT`` element of ``GetListMetaData`` or ``None``"""
+        row = self._fetch('SELECT fetched_at, data FROM meta_data WHERE list_id = ?', (str(list_id), ))
+        if row is None:
+            return None
+
+        fetched_at, data = row
+        return str(data), fetched_at
+
+    def save_meta_data(self, list_id, data, fetched_at=None):
+        self._execute('INSERT OR REPLACE INTO meta_data (list_id, fetched_at, data) VALUES (?, ?, ?)',
+                      (str(list_id), fetched_at or time.time(), sqlite3.Binary(data)))
+
+    def delete_meta_data(self, list_id=None):
+        """Deletes the stored meta-data of a list (of all lists by default)"""
+        if list_id is None:
+            self._execute('DELETE FROM meta_data', ())
+        else:
+            self._execute('DELETE FROM meta_data WHERE list_id = ?', (str(list_id), ))
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
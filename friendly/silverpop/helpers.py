@@ -25,9 +25,71 @@ SOFTWARE.
 """
 
 import re
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
 from dateutil.parser import parse as parse_datetime
 
+DATE_CACHE_SIZE = 1024  # Number of parsed timestamps to remember
+PEP_UP_CACHE_SIZE = 4096  # Number of normalized column names to remember
+
+
+# Engage's timestamps, e.g. ``6/25/04 3:29 PM``, ``12/19/2012 10:36 AM`` or ``05/31/2011 12:43:21``
+ENGAGE_DATE_RE = re.compile(
+    r'^\s*(\d{1,2})/(\d{1,2})/(\d{4}|\d{2})(?:\s+(\d{1,2}):(\d{2})(?::(\d{2}))?(?:\s*([AaPp])\.?[Mm]\.?)?)?\s*$')
+
+
+def parse_engage_date(value):
+    """Parses the date formats Engage emits.
+
+    Takes a regex fast path for Engage's ``month/day/year`` timestamps,
+    remembers recently parsed values and falls back to dateutil for
+    anything else.
+
+    Raises:
+        TypeError -- If ``value`` isn't a string, like dateutil does
+    """
+    if not isinstance(value, basestring):
+        return parse_datetime(value)
+
+    parsed = _parsed_dates.get(value)
+    if parsed is None:
+        parsed = _parse_engage_date(value)
+        _parsed_dates.set(value, parsed)
+    return parsed
+
+
+def _parse_engage_date(value):
+    match = ENGAGE_DATE_RE.match(value)
+    if match is None:
+        return parse_datetime(value)
+
+    month, day, year, hour, minute, second, meridiem = match.groups()
+
+    year = int(year)
+    if year < 100:
+        # Pick the century the way dateutil's ``convertyear`` does: within
+        # [-50, 49] years of today, so ``this_year - 50`` stays in the past
+        this_year = datetime.now().year
+        year += this_year // 100 * 100
+        if year >= this_year + 50:
+            year -= 100
+        elif year < this_year - 50:
+            year += 100
+
+    hour = int(hour or 0)
+    if meridiem is not None:
+        if meridiem in 'pP' and hour < 12:
+            hour += 12
+        elif meridiem in 'aA' and hour == 12:
+            hour = 0
+
+    try:
+        return datetime(year, int(month), int(day), hour, int(minute or 0), int(second or 0))
+    except ValueError:
+        return parse_datetime(value)
+
 
 def to_python(obj, str_keys=None, date_keys=None, int_keys=None, object_map=None,
               bool_keys=None, dict_keys=None, **kwargs):
@@ -62,7 +124,7 @@ def to_python(obj, str_keys=None, date_keys=None, int_keys=None, object_map=None
         for in_key in date_keys:
             in_date = get_value(in_key)
             try:
-                out_date = parse_datetime(in_date)
+                out_date = parse_engage_date(in_date)
             except TypeError, e:
                 raise e
                 out_date = None
@@ -99,6 +161,58 @@ def to_python(obj, str_keys=None, date_keys=None, int_keys=None, object_map=None
     return obj
 
 
+def compile_extractor(str_keys=None, date_keys=None, int_keys=None, bool_keys=None, dict_keys=None):
+    """Compiles a function which extends objects from elements like ``to_python``.
+
+    The returned ``extract(obj, el, **kwargs)`` walks the children of ``el``
+    only once and sets the attributes of ``obj`` directly. The values are
+    converted like ``to_python`` does and missing nodes raise the same
+    exception. Additional ``kwargs`` are set as attributes as well.
+    """
+    fields = {}  # Maps tags to (attribute, converter, skip_empty)
+    required = []  # Tags in the order ``to_python`` looks them up
+    for keys, convert, skip_empty in ((str_keys, None, False),
+                                      (date_keys, parse_engage_date, False),
+                                      (int_keys, int, True),
+                                      (bool_keys, bool, True),
+                                      (dict_keys, dict, True)):
+        for key in keys or ():
+            if key not in fields:
+                fields[key] = (key.lower(), convert, skip_empty)
+                required.append(key)
+
+    set_attribute = object.__setattr__
+
+    def extract(obj, el, **kwargs):
+        seen = set()
+        for child in el:
+            tag = child.tag
+            field = fields.get(tag)
+            if field is None or tag in seen:
+                continue
+            seen.add(tag)
+
+            attr, convert, skip_empty = field
+            value = child.text
+            if convert is not None:
+                if value is None and skip_empty:
+                    continue
+                value = convert(value)
+            set_attribute(obj, attr, value)
+
+        if len(seen) < len(required):
+            for key in required:
+                if key not in seen:
+                    raise Exception('Node ' + key + ' not found')
+
+        for name, value in kwargs.iteritems():
+            set_attribute(obj, name, value)
+
+        return obj
+
+    return extract
+
+
 def to_api(in_dict, int_keys=None, date_keys=None, bool_keys=None):
     """Extends a given object for API Production."""
 
@@ -135,9 +249,92 @@ def to_api(in_dict, int_keys=None, date_keys=None, bool_keys=None):
 
 first_cap_re = re.compile('(.)([A-Z][a-z]+)')
 all_cap_re = re.compile('([a-z0-9])([A-Z])')
+whitespace_re = re.compile(r'\s')
 
 
 def pep_up(name):
-    s1 = first_cap_re.sub(r'\1_\2', name)
-    s2 = all_cap_re.sub(r'\1_\2', s1).lower()
-    return re.sub(r'\s', '', s2)
+    """Turns a column name like ``First Name`` or ``LastModified`` into ``first_name`` or ``last_modified``.
+
+    The results are memoized as the same names are normalized over and over.
+    """
+    pepped = _pepped_names.get(name)
+    if pepped is None:
+        s1 = first_cap_re.sub(r'\1_\2', name)
+        s2 = all_cap_re.sub(r'\1_\2', s1).lower()
+        pepped = whitespace_re.sub('', s2)
+        _pepped_names.set(name, pepped)
+    return pepped
+
+
+class LRUCache(object):
+    """Thread-safe mapping with a bounded size which evicts the least recently used entries.
+
+    Args:
+        maxsize (int): Maximum number of entries
+        ttl (float): Seconds after which entries expire. ``None`` keeps them until they're evicted.
+    """
+
+    def __init__(self, maxsize=128, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()  # Maps keys to (value, expiry)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value, expires_at = self._data.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+
+            if expires_at is not None and expires_at <= time.time():
+                self.misses += 1
+                return default
+
+            self._data[key] = (value, expires_at)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, created_at=None):
+        """Caches a value. Its age is counted from ``created_at`` (now by default)."""
+        if created_at is None:
+            created_at = time.time()
+        expires_at = created_at + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (value, expires_at)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    @property
+    def hit_rate(self):
+        """Share of the lookups which were answered from the cache"""
+        lookups = self.hits + self.misses
+        return float(self.hits) / lookups if lookups else 0.0
+
+    def __contains__(self, key):
+        entry = self._data.get(key)
+        return entry is not None and (entry[1] is None or entry[1] > time.time())
+
+    def keys(self):
+        """Returns the cached keys, including expired ones which haven't been evicted yet"""
+        with self._lock:
+            return list(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+
+_parsed_dates = LRUCache(DATE_CACHE_SIZE)  # Memo of ``parse_engage_date``
+_pepped_names = LRUCache(PEP_UP_CACHE_SIZE)  # Memo of ``pep_up``
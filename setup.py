@@ -24,4 +24,7 @@ setup(name='friendly-silverpop',
           'requests',
           'python-dateutil',
       ],
+      extras_require = {
+          'lxml': ['lxml'],
+      },
 )
\ No newline at end of file
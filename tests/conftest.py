@@ -1,5 +1,6 @@
+import io
 import pytest
-from friendly.silverpop.engage.constants import LIST_VISIBILITY_SHARED
+from friendly.silverpop.engage.constants import LIST_VISIBILITY_SHARED, LIST_TYPE_DATABASE
 import settings
 from friendly.silverpop.engage.api import EngageApi
 
@@ -11,11 +12,11 @@ def engage_api():
 
 @pytest.fixture(scope='session')
 def test_database(engage_api):
-    # Fetch all private databases of the account
-    databases = engage_api.get_databases(LIST_VISIBILITY_SHARED)
+    # Fetch all shared databases of the account
+    databases = engage_api.get_catalog(LIST_VISIBILITY_SHARED, LIST_TYPE_DATABASE)
 
     # Locate our test database
-    db = next(iter([db for db in databases if db.id == settings.ENGAGE_DATABASE_ID]), None)
+    db = databases.get(settings.ENGAGE_DATABASE_ID)
     assert db is not None
     assert 'test' in db.name.lower()
     return db
@@ -24,4 +25,76 @@ def test_database(engage_api):
 def random_string(length=16):
     import random
     import string
-    return ''.join(random.choice(string.ascii_uppercase + string.digits) for x in range(length))
\ No newline at end of file
+    return ''.join(random.choice(string.ascii_uppercase + string.digits) for x in range(length))
+
+
+def engage_response(result='', success=True):
+    """Builds the XML of an Engage response"""
+    return ('<Envelope><Body><RESULT><SUCCESS>%s</SUCCESS>%s</RESULT></Body></Envelope>'
+            % ('true' if success else 'false', result))
+
+
+def engage_fault(error_id, message='Error', code='Client'):
+    """Builds the XML of a failed Engage response"""
+    return ('<Envelope><Body><RESULT><SUCCESS>false</SUCCESS></RESULT><Fault><Request/>'
+            '<FaultCode>%s</FaultCode><FaultString>%s</FaultString><detail><error>'
+            '<errorid>%d</errorid><module/><class>SP.API</class><method/></error></detail></Fault></Body></Envelope>'
+            % (code, message, error_id))
+
+
+def engage_list(list_id, name, list_type=0, size=0, parent_folder_id=0, last_modified='6/25/04 3:29 PM',
+                is_folder=False):
+    """Builds the XML of a ``LIST`` element as returned by ``GetLists``"""
+    return ('<LIST><ID>%d</ID><NAME>%s</NAME><TYPE>%d</TYPE><SIZE>%d</SIZE><NUM_OPT_OUTS>0</NUM_OPT_OUTS>'
+            '<NUM_UNDELIVERABLE>0</NUM_UNDELIVERABLE><LAST_MODIFIED>%s</LAST_MODIFIED><VISIBILITY>1</VISIBILITY>'
+            '<PARENT_NAME>Folder</PARENT_NAME><USER_ID>abc-123</USER_ID><PARENT_FOLDER_ID>%d</PARENT_FOLDER_ID>'
+            '<IS_FOLDER>%s</IS_FOLDER><FLAGGED_FOR_BACKUP>false</FLAGGED_FOR_BACKUP>'
+            '<SUPPRESSION_LIST_ID>0</SUPPRESSION_LIST_ID></LIST>'
+            % (list_id, name, list_type, size, last_modified, parent_folder_id, 'true' if is_folder else 'false'))
+
+
+def engage_meta_data(key_columns=('Email', ), columns=('Email', 'First Name')):
+    """Builds the ``RESULT`` children of a ``GetListMetaData`` response"""
+    return ('<ORGANIZATION_ID>org</ORGANIZATION_ID><CREATED>01/02/2015 10:00 AM</CREATED>'
+            '<LAST_CONFIGURED>01/02/2015 10:00 AM</LAST_CONFIGURED>'
+            '<OPT_IN_FORM_DEFINED>false</OPT_IN_FORM_DEFINED><OPT_OUT_FORM_DEFINED>false</OPT_OUT_FORM_DEFINED>'
+            '<PROFILE_FORM_DEFINED>false</PROFILE_FORM_DEFINED>'
+            '<OPT_IN_AUTOREPLY_DEFINED>false</OPT_IN_AUTOREPLY_DEFINED>'
+            '<PROFILE_AUTOREPLY_DEFINED>false</PROFILE_AUTOREPLY_DEFINED>'
+            '<KEY_COLUMNS>%s</KEY_COLUMNS><COLUMNS>%s</COLUMNS>'
+            % (''.join('<COLUMN><NAME>%s</NAME></COLUMN>' % name for name in key_columns),
+               ''.join('<COLUMN><NAME>%s</NAME><TYPE>0</TYPE></COLUMN>' % name for name in columns)))
+
+
+class FakeRequests(object):
+    """Stands in for a requests session and answers with canned Engage responses"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def post(self, url, data=None, headers=None, **kwargs):
+        from requests.models import Response
+
+        if not isinstance(data, str):
+            data = ''.join(data)
+        self.calls.append(dict(url=url, data=data, headers=headers, **kwargs))
+
+        body = self.responses.pop(0)
+        if callable(body):
+            body = body(url, data)
+
+        response = Response()
+        response.status_code = 200
+        if kwargs.get('stream'):
+            response.raw = io.BytesIO(body)
+        else:
+            response._content = body
+        return response
+
+
+@pytest.fixture
+def offline_api():
+    api = EngageApi('user', 'secret', 'https://api.example.com/XMLAPI')
+    api._requests = FakeRequests()
+    return api
@@ -2,7 +2,7 @@ import re
 import datetime
 import pytest
 from friendly.silverpop.engage.constants import LIST_VISIBILITY_SHARED, EXPORT_TYPE_ALL, EXPORT_FORMAT_CSV, \
-    LIST_VISIBILITY_PRIVATE, COLUMN_TYPE_TEXT
+    LIST_VISIBILITY_PRIVATE, COLUMN_TYPE_TEXT, JOB_STATUS_COMPLETE
 from friendly.silverpop.engage.resources import Session, Contact
 from friendly.silverpop.engage.api import CONTACT_CREATED_MANUALLY
 from friendly.silverpop.engage.exceptions import RecipientAlreadyExistsError, EngageError, ColumnAlreadyExistsError, \
@@ -72,8 +72,9 @@ def test_export_list(engage_api):
     except RecipientAlreadyExistsError:
         pass
 
-    (success, job_id, file_path) = engage_api.export_list(settings.ENGAGE_DATABASE_ID, EXPORT_TYPE_ALL, EXPORT_FORMAT_CSV)
-    assert success is True
+    job = engage_api.export_list(settings.ENGAGE_DATABASE_ID, EXPORT_TYPE_ALL, EXPORT_FORMAT_CSV)
+    assert job.file_path
+    assert job.wait(timeout=300).status == JOB_STATUS_COMPLETE
 
     # Remove recipient
     success = engage_api.remove_recipient(settings.ENGAGE_DATABASE_ID, EMAIL)
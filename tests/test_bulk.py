@@ -0,0 +1,59 @@
+import threading
+import time
+from friendly.silverpop.engage.concurrency import Executor
+from friendly.silverpop.engage.parsers import Fault, RowResult
+from tests.conftest import FakeRequests, engage_response, engage_fault
+
+
+def test_imap_keeps_the_order_and_bounds_the_items_in_flight():
+    consumed = []
+
+    def items():
+        for i in range(10):
+            consumed.append(i)
+            yield i
+
+    def slow_square(i):
+        time.sleep(0.01 * (i % 3))
+        return i * i
+
+    executor = Executor(workers=2)
+    results = executor.imap(slow_square, items(), window=3)
+
+    assert next(results) == 0
+    assert len(consumed) == 3
+    assert list(results) == [i * i for i in range(1, 10)]
+    executor.shutdown()
+
+
+class Unserializable(object):
+    def __unicode__(self):
+        raise ValueError('bad value')
+
+
+def test_add_recipients_reports_each_row(offline_api):
+    lock = threading.Lock()
+
+    def respond(url, data):
+        with lock:
+            if 'fail@example.com' in data:
+                return engage_fault(122, 'Recipient already exists')
+            return engage_response('<RecipientId>%d</RecipientId>' % (100 + len(offline_api._requests.calls)))
+
+    rows = [{'EMAIL': 'a@example.com'}, ('row-b', {'EMAIL': 'fail@example.com'}), {'EMAIL': 'c@example.com'},
+            {'EMAIL': 'd@example.com', 'BAD': Unserializable()}]
+    offline_api._requests = FakeRequests(engage_response('<SESSIONID>abc</SESSIONID>'), *([respond] * 3))
+    offline_api.login()
+
+    results = list(offline_api.add_recipients(1, iter(rows), concurrency=3, update_if_found=True))
+
+    assert [result.row_id for result in results] == [0, 'row-b', 2, 3]
+    assert [result.success for result in results] == [True, False, True, False]
+    assert results[0].recipient_id > 100
+    assert results[1] == RowResult('row-b', False, None, Fault('Client', 'Recipient already exists', 122))
+    assert results[1].error_id == 122
+    assert (results[3].fault_code, results[3].fault_string) == (None, 'bad value')
+    assert len(offline_api._requests.calls) == 4
+
+    sent = [call['data'] for call in offline_api._requests.calls[1:]]
+    assert all('<UPDATE_IF_FOUND>true</UPDATE_IF_FOUND>' in data for data in sent)
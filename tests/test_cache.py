@@ -0,0 +1,165 @@
+import threading
+import pytest
+from friendly.silverpop.engage.api import EngageApi
+from friendly.silverpop.engage.cache import CatalogCache
+from friendly.silverpop.engage.catalog import ListCatalog
+from friendly.silverpop.engage.constants import CONTACT_CREATED_MANUALLY
+from friendly.silverpop.engage.exceptions import RecipientIsNotAMemberError
+from tests.conftest import FakeRequests, engage_response, engage_fault, engage_list
+
+
+class FakeApi(object):
+    """Answers ``get_catalog`` with the next of the given catalogs"""
+
+    def __init__(self, *catalogs):
+        self.catalogs = list(catalogs)
+        self.calls = 0
+        self.gate = threading.Event()  # Fetches wait until it is set
+        self.gate.set()
+
+    def get_catalog(self, visibility, list_type):
+        from xml.etree.ElementTree import fromstring
+        self.gate.wait(5)
+        self.calls += 1
+        lists = self.catalogs.pop(0)
+        return ListCatalog.from_elements([fromstring(xml) for xml in lists])
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('friendly.silverpop.engage.cache.time.time', lambda: now[0])
+    return now
+
+
+def test_stale_catalogs_are_served_while_refreshing(clock):
+    api = FakeApi(
+        [engage_list(1, 'Customers', size=1), engage_list(2, 'Newsletter')],
+        [engage_list(1, 'Customers', size=2, last_modified='6/26/04 3:29 PM'), engage_list(3, 'Leads')])
+    cache = CatalogCache(api, ttl=60)
+
+    changes = []
+    cache.add_listener(lambda key, changed, removed: changes.append((key, sorted(changed), removed)))
+
+    first = cache.get(1, 0)
+    assert cache.get(1, 0) is first
+    assert api.calls == 1
+
+    clock[0] += 60
+    api.gate.clear()
+    stale = cache.get(1, 0)
+    assert stale is first  # Served at once
+
+    future = cache.refresh_async(1, 0)  # Joins the refresh in flight
+    api.gate.set()
+    future.result(timeout=5)
+    refreshed = cache.get(1, 0)
+    assert refreshed is not first
+    assert refreshed[1].size == 2
+    assert api.calls == 2
+    assert changes == [((1, 0), [1, 3], [2])]
+    cache.close()
+
+
+def test_catalogs_beyond_max_stale_are_refreshed_first(clock):
+    api = FakeApi([engage_list(1, 'Customers')], [engage_list(1, 'Clients')])
+    cache = CatalogCache(api, ttl=60, max_stale=120)
+
+    cache.get(1, 0)
+    clock[0] += 120
+    assert cache.get(1, 0).find('Clients') is not None
+
+    cache.invalidate()
+    with pytest.raises(IndexError):
+        cache.get(1, 0)
+
+
+def test_get_lists_is_served_from_the_catalog_cache():
+    api = EngageApi('user', 'secret', 'https://api.example.com/XMLAPI', catalog_ttl=60)
+    api._requests = FakeRequests(
+        engage_response('<SESSIONID>abc</SESSIONID>'),
+        engage_response(engage_list(1, 'Customers') + engage_list(2, 'Archive')))
+
+    assert [item.id for item in api.get_databases(1)] == [1, 2]
+    assert [item.name for item in api.get_databases(1)] == ['Customers', 'Archive']
+    assert len(api._requests.calls) == 2
+    api.close()
+
+
+def engage_recipient(email, recipient_id=1):
+    return engage_response('<EMAIL>%s</EMAIL><ORGANIZATION_ID>org</ORGANIZATION_ID><RecipientId>%d</RecipientId>'
+                           '<EmailType>0</EmailType><CreatedFrom>1</CreatedFrom>'
+                           '<LastModified>6/25/04 3:29 PM</LastModified>' % (email, recipient_id))
+
+
+def recipient_api(*responses):
+    api = EngageApi('user', 'secret', 'https://api.example.com/XMLAPI', recipient_ttl=60,
+                    recipient_negative_ttl=60)
+    api._requests = FakeRequests(engage_response('<SESSIONID>abc</SESSIONID>'), *responses)
+    return api
+
+
+def test_recipients_are_cached_until_they_change():
+    api = recipient_api(
+        engage_recipient('john@example.com'),
+        engage_response(),
+        engage_recipient('john@example.com', recipient_id=2))
+
+    contact = api.select_recipient_data(1, 'john@example.com')
+    assert api.select_recipient_data(1, 'John@Example.com') is contact
+    assert len(api._requests.calls) == 2
+
+    assert api.update_recipient(1, {'Email': 'john@example.com', 'Name': 'John'})
+    assert api.select_recipient_data(1, 'john@example.com').recipientid == 2
+    assert len(api._requests.calls) == 4
+
+
+def test_missing_recipients_are_cached():
+    api = recipient_api(
+        engage_fault(128, 'Recipient is not a member of the list'),
+        engage_response(),
+        engage_recipient('jane@example.com'))
+
+    for _ in range(2):
+        with pytest.raises(RecipientIsNotAMemberError):
+            api.select_recipient_data(1, 'jane@example.com')
+    assert len(api._requests.calls) == 2
+
+    assert api.add_recipient(1, CONTACT_CREATED_MANUALLY, {'EMAIL': 'jane@example.com'})
+    assert api.select_recipient_data(1, 'jane@example.com').email == 'jane@example.com'
+
+
+def test_lookups_overlapping_with_changes_are_not_cached():
+    def respond(url, data):
+        # The recipient is removed while it is being looked up
+        api.remove_recipient(1, 'john@example.com')
+        return engage_recipient('john@example.com')
+
+    api = recipient_api(respond, engage_response(), engage_recipient('john@example.com'))
+
+    api.select_recipient_data(1, 'john@example.com')
+    api.select_recipient_data(1, 'john@example.com')
+    assert len(api._requests.calls) == 4
+
+
+def test_changes_of_a_database_drop_the_lookups_through_other_lists():
+    api = recipient_api(
+        engage_recipient('john@example.com'),
+        engage_response(),
+        engage_recipient('john@example.com', recipient_id=2))
+
+    assert api.select_recipient_data(2, 'john@example.com').recipientid == 1  # A query of database 1
+    assert api.update_recipient(1, {'Email': 'john@example.com', 'Name': 'John'})
+    assert api.select_recipient_data(2, 'john@example.com').recipientid == 2
+    assert api._recipient_lists == {u'john@example.com': set(['2'])}
+
+
+@pytest.mark.parametrize('ttl', [None, 60])
+def test_non_string_addresses_are_sent_to_engage(ttl):
+    api = EngageApi('user', 'secret', 'https://api.example.com/XMLAPI', recipient_ttl=ttl)
+    api._requests = FakeRequests(engage_response('<SESSIONID>abc</SESSIONID>'),
+                                 engage_fault(128, 'Recipient is not a member of the list'))
+
+    with pytest.raises(RecipientIsNotAMemberError):
+        api.select_recipient_data(1, 88351415068)
+    assert '<EMAIL>88351415068</EMAIL>' in api._requests.calls[-1]['data']
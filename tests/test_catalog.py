@@ -0,0 +1,65 @@
+from datetime import datetime
+from xml.etree.ElementTree import fromstring
+from friendly.silverpop.engage.catalog import ListCatalog
+from friendly.silverpop.engage.resources import Database, ContactList, CompactDatabase
+from tests.conftest import FakeRequests, engage_response, engage_list
+
+
+def catalog_of(*lists, **kwargs):
+    return ListCatalog.from_elements([fromstring(xml) for xml in lists], **kwargs)
+
+
+def test_catalog_looks_up_lists_by_id_and_name():
+    catalog = catalog_of(
+        engage_list(1, 'Customers', size=42),
+        engage_list(2, 'Newsletter', list_type=18, parent_folder_id=10),
+        engage_list(3, 'Newsletter', list_type=18, parent_folder_id=11))
+
+    assert len(catalog) == 3
+    assert 2 in catalog and 4 not in catalog
+    assert list(catalog.ids) == [1, 2, 3]
+    assert list(catalog.sizes) == [42, 0, 0]
+
+    database = catalog[1]
+    assert isinstance(database, Database)
+    assert (database.id, database.name, database.size, database.is_folder) == (1, 'Customers', 42, False)
+    assert database.last_modified == datetime(2004, 6, 25, 15, 29)
+
+    assert catalog.find('Customers').id == 1
+    assert [item.id for item in catalog.filter_by_name('Newsletter')] == [2, 3]
+    assert catalog.find('Unknown') is None
+    assert catalog.get(4) is None
+
+
+def test_catalog_replaces_lists_with_the_same_id():
+    catalog = catalog_of(engage_list(1, 'Customers'), engage_list(1, 'Clients'))
+
+    assert len(catalog) == 1
+    assert catalog.find('Customers') is None
+    assert catalog[1].name == 'Clients'
+    assert [item.name for item in catalog] == ['Clients']
+
+
+def test_catalog_folder_tree():
+    catalog = catalog_of(
+        engage_list(10, 'Folder', is_folder=True),
+        engage_list(11, 'Subfolder', parent_folder_id=10, is_folder=True),
+        engage_list(1, 'Customers', parent_folder_id=10),
+        engage_list(2, 'Newsletter', list_type=18, parent_folder_id=11))
+
+    assert [item.id for item in catalog.children(10)] == [11, 1]
+    assert isinstance(catalog.children(11)[0], ContactList)
+    assert list(catalog.descendant_ids(10)) == [11, 2, 1]
+    assert list(catalog.descendant_ids(1)) == []
+
+
+def test_get_catalog(offline_api):
+    offline_api.compact = True
+    offline_api._requests = FakeRequests(
+        engage_response('<SESSIONID>abc</SESSIONID>'),
+        engage_response(engage_list(1, 'Customers') + engage_list(2, 'Newsletter', list_type=18)))
+
+    catalog = offline_api.get_catalog(1, 0)
+    database = catalog.find('Customers')
+    assert type(database) is CompactDatabase
+    assert database.api is offline_api
@@ -0,0 +1,160 @@
+import threading
+import time
+import pytest
+from friendly.silverpop.engage.api import ThreadedEngageApi, GET_LISTS_ENVELOPE
+from friendly.silverpop.engage.concurrency import Executor, Future, TimeoutError
+from friendly.silverpop.engage.exceptions import RecipientAlreadyExistsError, EngageError
+from friendly.silverpop.engage.api import CONTACT_CREATED_MANUALLY
+from tests.conftest import FakeRequests, engage_response, engage_fault, engage_list
+
+
+def test_future_result_and_callbacks():
+    future = Future()
+    seen = []
+    future.add_done_callback(seen.append)
+
+    with pytest.raises(TimeoutError):
+        future.result(timeout=0.01)
+
+    future.set_result(42)
+    assert future.done()
+    assert future.result() == 42
+    assert seen == [future]
+
+    # Callbacks added later are called at once
+    future.add_done_callback(seen.append)
+    assert len(seen) == 2
+
+
+def test_executor_limits_running_calls():
+    executor = Executor(workers=2)
+    lock = threading.Lock()
+    running = []
+    peak = []
+    release = threading.Event()
+
+    def work(i):
+        with lock:
+            running.append(i)
+            peak.append(len(running))
+        release.wait(1)
+        with lock:
+            running.remove(i)
+        return i * 2
+
+    futures = executor.map(work, range(6))
+    release.set()
+
+    assert [f.result(1) for f in futures] == [0, 2, 4, 6, 8, 10]
+    assert max(peak) <= 2
+    executor.shutdown()
+
+
+def test_executor_propagates_exceptions():
+    executor = Executor(workers=1)
+
+    def fail():
+        raise ValueError('nope')
+
+    future = executor.submit(fail)
+    with pytest.raises(ValueError):
+        future.result(1)
+    assert isinstance(future.exception(), ValueError)
+    executor.shutdown()
+
+
+def test_threaded_api_returns_futures():
+    api = ThreadedEngageApi('user', 'secret', 'https://api.example.com/XMLAPI', concurrency=4)
+    api.api._requests = FakeRequests(
+        engage_response('<SESSIONID>abc</SESSIONID>'),
+        engage_response(),
+        engage_fault(122, 'Recipient already exists'),
+        engage_response())
+
+    assert api.login().result(1) is True
+    assert api.session.id == 'abc'
+
+    assert api.add_recipient(1, CONTACT_CREATED_MANUALLY, {'email': 'a@example.com'}).result(1) is True
+
+    future = api.add_recipient(1, CONTACT_CREATED_MANUALLY, {'email': 'a@example.com'})
+    with pytest.raises(RecipientAlreadyExistsError):
+        future.result(1)
+
+    results = api.add_recipients(1, [{'email': 'b@example.com'}]).result(1)
+    assert [result.success for result in results] == [True]
+
+    assert api.add_recipient.__doc__ == 'Adds a new contact to an existing database'
+    api.close()
+
+
+def slow_engage(calls, release):
+    def respond(url, data):
+        if '<Login>' in data:
+            return engage_response('<SESSIONID>abc</SESSIONID>')
+        calls.append(data)
+        release.wait(1)
+        return engage_response(engage_list(1, 'Test'))
+    return respond
+
+
+def test_identical_reads_share_one_request(offline_api):
+    calls = []
+    release = threading.Event()
+    offline_api._requests = FakeRequests(*([slow_engage(calls, release)] * 10))
+    offline_api.login()
+
+    results = []
+
+    def read():
+        results.append(offline_api.get(GET_LISTS_ENVELOPE.render('1', '0'), coalesce=True))
+
+    threads = [threading.Thread(target=read) for i in range(5)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert len(results) == 5
+    assert all(result is results[0] for result in results)
+
+    # Later reads aren't served from the finished request
+    offline_api.get(GET_LISTS_ENVELOPE.render('1', '0'), coalesce=True)
+    assert len(calls) == 2
+
+
+def test_coalesced_faults_are_raised_for_every_caller(offline_api):
+    offline_api._requests = FakeRequests(engage_response('<SESSIONID>abc</SESSIONID>'), engage_fault(128))
+
+    with pytest.raises(EngageError):
+        offline_api.get(GET_LISTS_ENVELOPE.render('1', '0'), coalesce=True)
+    assert offline_api.error.error_id == 128
+    assert offline_api._inflight == {}
+
+
+def test_threaded_api_coalesces_identical_reads_into_separate_results():
+    api = ThreadedEngageApi('user', 'secret', 'https://api.example.com/XMLAPI', concurrency=4)
+    calls = []
+    release = threading.Event()
+    api.api._requests = FakeRequests(*([slow_engage(calls, release)] * 10))
+    api.api.login()
+
+    first = api.get_databases(1)
+    second = api.get_databases(1)
+    other = api.get_queries(1)
+    assert first is not second
+    time.sleep(0.05)
+
+    release.set()
+    (mine, theirs) = (first.result(1), second.result(1))
+    other.result(1)
+    assert len(calls) == 2  # One request per distinct read
+
+    # Each caller gets its own resources
+    assert mine is not theirs and mine[0] is not theirs[0]
+    mine[0].name = 'Changed'
+    mine.append(None)
+    assert (theirs[0].name, len(theirs)) == ('Test', 1)
+    api.close()
@@ -1,6 +1,9 @@
 import pytest
-from friendly.silverpop.engage.resources import Table, Column, Contact
+from friendly.silverpop.engage.api import EngageApi
+from friendly.silverpop.engage.resources import Table, Column, Contact, List, Database, CompactColumn, \
+    CompactContact, CompactList, CompactDatabase
 from friendly.silverpop.engage.constants import COLUMN_TYPE_TEXT, COLUMN_TYPE_YESNO
+from tests.conftest import FakeRequests, engage_response, engage_list, engage_meta_data
 
 
 def test_table_definition():
@@ -57,4 +60,125 @@ def test_create_table():
     key_column = next(iter(table.key_columns), None)
     assert key_column == 'email'
 
-    assert len(table.column_names) == 4
\ No newline at end of file
+    assert len(table.column_names) == 4
+
+
+def test_table_lookup_by_name_and_id():
+    table = Table()
+    table.add_column(Column('Email', COLUMN_TYPE_TEXT, None, is_key=True))
+    table.add_column(Column('First Name', COLUMN_TYPE_TEXT))
+
+    assert table['first_name'] is table['First Name']
+    assert table.has_column('First Name')
+    assert table.has_column('first_name')
+    assert table.get_column('Last Name') is None
+
+    assert table.key_columns == ('email', )
+    assert table.key_columns is table.key_columns
+    assert sorted(table.column_names) == ['email', 'first_name']
+
+    table.drop_column('First Name')
+    assert not table.has_column('first_name')
+    assert table.column_names == ('email', )
+
+
+def test_compact_resources_have_no_dict():
+    table = Table()
+    table.add_column(CompactColumn('Email', COLUMN_TYPE_TEXT, None, is_key=True))
+    table.add_column(CompactColumn('First Name', COLUMN_TYPE_TEXT))
+
+    column = table['first_name']
+    assert isinstance(column, Column)
+    assert (column.id, column.name, column.is_key) == ('first_name', 'First Name', False)
+
+    contact = CompactContact(from_table=table)
+    contact.email = 'john@example.com'
+    contact.first_name = 'John'
+    assert (contact.email, contact.first_name) == ('john@example.com', 'John')
+    assert isinstance(contact, Contact)
+
+    with pytest.raises(ValueError):
+        contact.last_name = 'Doe'
+
+    with pytest.raises(AttributeError):
+        CompactContact(from_table=table).first_name
+
+    for obj in (column, contact, CompactList(), CompactDatabase()):
+        assert not hasattr(obj, '__dict__')
+
+    assert isinstance(CompactDatabase(), Database)
+    assert isinstance(CompactDatabase(), List)
+    assert not isinstance(CompactList(), Database)
+
+
+def test_compact_api_hydrates_slotted_resources():
+    api = EngageApi('user', 'secret', 'https://api.example.com/XMLAPI', compact=True)
+    api._requests = FakeRequests(
+        engage_response('<SESSIONID>abc</SESSIONID>'),
+        engage_response(engage_list(1, 'Customers') + engage_list(2, 'Newsletter', list_type=18)),
+        engage_response(engage_meta_data()))
+
+    database, contact_list = api.get_lists(1, 0)
+    assert type(database) is CompactDatabase
+    assert type(contact_list) is CompactList
+    assert (database.id, database.name, database.api) == (1, 'Customers', api)
+
+    assert database.get_meta_data()
+    assert database.organization_id == 'org'
+    assert type(database._table['email']) is CompactColumn
+
+    contact = database.create_contact()
+    assert type(contact) is CompactContact
+    contact.first_name = 'John'
+    assert contact.first_name == 'John'
+
+
+def test_meta_data_is_cached_until_the_schema_changes():
+    offline_api = EngageApi('user', 'secret', 'https://api.example.com/XMLAPI', meta_data_ttl=300)
+    offline_api._requests = FakeRequests(
+        engage_response('<SESSIONID>abc</SESSIONID>'),
+        engage_response(engage_meta_data()),
+        engage_response(),
+        engage_response(engage_meta_data(columns=('Email', 'First Name', 'Last Name'))))
+
+    database = Database()
+    database.id = 1
+    database.api = offline_api
+
+    assert database.get_meta_data()
+    other = Database()
+    other.id = 1
+    assert offline_api.get_list_meta_data(other)
+    assert other._table is not database._table
+    assert len(offline_api._requests.calls) == 2
+
+    # Each list gets its own table
+    other._table.drop_column('First Name')
+    assert database._table.has_column('First Name')
+    third = Database()
+    third.id = 1
+    assert offline_api.get_list_meta_data(third)
+    assert third._table.has_column('First Name')
+    assert len(offline_api._requests.calls) == 2
+
+    cache = offline_api.meta_data_cache
+    assert (cache.hits, cache.misses) == (2, 1)
+
+    assert offline_api.add_list_column(database, 'Last Name', COLUMN_TYPE_TEXT, '')
+    assert database.get_meta_data()
+    assert database._table.has_column('Last Name')
+    assert len(offline_api._requests.calls) == 4
+
+
+def test_recipient_mailings_are_returned(offline_api):
+    offline_api._requests = FakeRequests(
+        engage_response('<SESSIONID>abc</SESSIONID>'),
+        engage_response('<MAILING><MAILING_ID>9</MAILING_ID><MAILING_NAME>Welcome</MAILING_NAME></MAILING>'))
+
+    database = Database()
+    database.id = 1
+    contact = Contact(from_table=Table())
+    object.__setattr__(contact, 'id', 42)
+
+    assert offline_api.get_recipient_mailings(database, contact) == [{'mailing_id': '9', 'mailing_name': 'Welcome'}]
+    assert '<RECIPIENT_ID>42</RECIPIENT_ID>' in offline_api._requests.calls[-1]['data']
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+from friendly.silverpop.engage.api import generate_envelope, append_text_node_to, append_columns_to, \
+    append_sync_fields_to, append_list_to, LOGIN_ENVELOPE, LOGOUT_ENVELOPE
+from friendly.silverpop.engage.envelope import Envelope, EnvelopeTemplate, escape, to_body, to_bytes
+
+
+def test_template_matches_minidom():
+    body_node, doc = generate_envelope('Login')
+    append_text_node_to('USERNAME', u'j\xf6hn', body_node)
+    append_text_node_to('PASSWORD', 'a&b<c>"d"', body_node)
+
+    assert LOGIN_ENVELOPE.render(u'j\xf6hn', 'a&b<c>"d"') == doc.toxml(encoding='utf-8')
+
+
+def test_template_without_values_matches_minidom():
+    body_node, doc = generate_envelope('Logout')
+
+    assert LOGOUT_ENVELOPE.render() == doc.toxml(encoding='utf-8')
+
+
+def test_template_checks_number_of_values():
+    with pytest.raises(ValueError):
+        EnvelopeTemplate('GetLists', ('VISIBILITY', 'LIST_TYPE')).render('1')
+
+
+def test_envelope_matches_minidom():
+    columns = {'email': 'john@example.com', 'name': u'J\xf6hn & Doe'}
+
+    body_node, doc = generate_envelope('AddRecipient')
+    append_text_node_to('LIST_ID', '123', body_node)
+    append_columns_to(columns, body_node)
+    append_sync_fields_to({}, body_node)
+    append_list_to(['a', 'b'], body_node, container_node_name='CONTACT_LISTS', item_node_name='CONTACT_LIST_ID')
+    append_list_to([], body_node, container_node_name='SELECTION_VALUES', item_node_name='VALUE')
+
+    envelope = Envelope('AddRecipient')
+    envelope.append_text('LIST_ID', '123')
+    envelope.append_columns(columns)
+    envelope.append_sync_fields({})
+    envelope.append_list(['a', 'b'], container_node_name='CONTACT_LISTS', item_node_name='CONTACT_LIST_ID')
+    envelope.append_list([], container_node_name='SELECTION_VALUES', item_node_name='VALUE')
+
+    assert envelope.tobytes() == doc.toxml(encoding='utf-8')
+
+
+def test_escape():
+    assert escape('plain') == 'plain'
+    assert escape(u'\xe4&') == '\xc3\xa4&amp;'
+    assert escape(42) == '42'
+
+
+def test_to_bytes_accepts_all_envelope_kinds():
+    body_node, doc = generate_envelope('Logout')
+    expected = doc.toxml(encoding='utf-8')
+
+    assert to_bytes(doc) == expected
+    assert to_bytes(Envelope('Logout')) == expected
+    assert to_bytes(LOGOUT_ENVELOPE.render()) == expected
+
+
+def test_streaming_envelope_consumes_rows_lazily():
+    consumed = []
+
+    def rows():
+        for i in range(3):
+            consumed.append(i)
+            yield {'Record Id': 'id-%d' % i}
+
+    envelope = Envelope('InsertUpdateRelationalTable', stream=True)
+    envelope.append_text('TABLE_ID', '1')
+    envelope.append_rows(rows())
+    assert consumed == []
+
+    chunks = envelope.iter_chunks()
+    assert next(chunks).endswith('<InsertUpdateRelationalTable>')
+    assert consumed == []
+
+    body = next(chunks) + ''.join(chunks)
+    assert consumed == [0, 1, 2]
+    assert body.startswith('<TABLE_ID>1</TABLE_ID><ROWS><ROW><COLUMN name="Record Id">id-0</COLUMN></ROW>')
+    assert body.endswith('</ROWS></InsertUpdateRelationalTable></Body></Envelope>')
+
+
+def test_rows_must_be_dicts():
+    envelope = Envelope('InsertUpdateRelationalTable')
+    with pytest.raises(TypeError):
+        envelope.append_rows([{'id': '1'}, ('id', '2')])
+
+    envelope = Envelope('InsertUpdateRelationalTable', stream=True)
+    envelope.append_rows(iter([('id', '1')]))
+    with pytest.raises(TypeError):
+        envelope.tobytes()
+
+
+def test_none_values_are_rejected():
+    with pytest.raises(TypeError):
+        Envelope('AddRecipient').append_namevalues({'Email': None}, container_node_name='COLUMNS')
+
+    with pytest.raises(TypeError):
+        Envelope('InsertUpdateRelationalTable').append_rows([{'id': None}])
+
+    envelope = Envelope('InsertUpdateRelationalTable', stream=True)
+    envelope.append_rows(iter([{'id': None}]))
+    with pytest.raises(TypeError):
+        envelope.tobytes()
+
+
+def test_to_body_buffers_streaming_envelopes():
+    envelope = Envelope('InsertUpdateRelationalTable', stream=True)
+    envelope.append_rows({'name': 'x' * 1000} for i in range(200))
+
+    body = to_body(envelope)
+    assert not isinstance(body, str)
+
+    chunks = list(body)
+    assert len(chunks) == 4
+    assert ''.join(chunks).count('<ROW>') == 200
+
+    assert to_body(Envelope('Logout')) == to_bytes(Envelope('Logout'))
+
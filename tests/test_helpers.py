@@ -0,0 +1,115 @@
+from datetime import datetime
+from xml.etree.ElementTree import fromstring
+import pytest
+from friendly.silverpop.engage.resources import List, Database, Contact
+from dateutil.parser import parse as parse_datetime, parser, parserinfo
+from friendly.silverpop import helpers
+from friendly.silverpop.helpers import LRUCache, compile_extractor, to_python, parse_engage_date
+from tests.conftest import engage_list
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+
+    # Touch 'a' so 'b' becomes the least recently used entry
+    assert cache.get('a') == 1
+
+    cache.set('c', 3)
+    assert 'b' not in cache
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert len(cache) == 2
+
+    cache.delete('a')
+    assert cache.get('a') is None
+    assert cache.get('a', 0) == 0
+
+
+def test_lru_cache_expires_entries_and_counts_hits(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('friendly.silverpop.helpers.time.time', lambda: now[0])
+
+    cache = LRUCache(2, ttl=10)
+    cache.set('a', 1)
+    assert cache.get('a') == 1
+    assert 'a' in cache
+
+    now[0] += 10
+    assert 'a' not in cache
+    assert cache.get('a') is None
+    assert cache.get('b') is None
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert cache.hit_rate == 1 / 3.0
+
+
+def test_compiled_extractor_matches_to_python():
+    el = fromstring(engage_list(42, 'Customers', size=1000, last_modified='12/19/12 10:36 AM'))
+    keys = dict(str_keys=List._str_keys, int_keys=List._int_keys, date_keys=List._date_keys,
+                bool_keys=List._bool_keys)
+
+    expected = to_python(Database(), in_el=el, api=None, **keys)
+    actual = compile_extractor(**keys)(Database(), el, in_el=el, api=None)
+
+    expected.__dict__.pop('_cache')
+    assert actual.__dict__ == expected.__dict__
+    assert actual.last_modified == datetime(2012, 12, 19, 10, 36)
+
+
+def test_compiled_extractor_skips_empty_ints_and_requires_nodes():
+    extract = compile_extractor(str_keys=('NAME', ), int_keys=('SIZE', ))
+
+    obj = extract(Database(), fromstring('<LIST><NAME/><SIZE/><SIZE>3</SIZE></LIST>'))
+    assert obj.name is None
+    assert not hasattr(obj, 'size')
+
+    with pytest.raises(Exception) as e:
+        extract(Database(), fromstring('<LIST><SIZE>3</SIZE></LIST>'))
+    assert str(e.value) == 'Node NAME not found'
+
+
+def test_resources_compile_their_extractor():
+    contact = Contact.from_element(fromstring(
+        '<RESULT><EMAIL>john@example.com</EMAIL><ORGANIZATION_ID>abc</ORGANIZATION_ID><RecipientId>7</RecipientId>'
+        '<EmailType>0</EmailType><CreatedFrom>1</CreatedFrom><LastModified>6/25/04 3:29 PM</LastModified></RESULT>'),
+        None)
+
+    assert contact.email == 'john@example.com'
+    assert contact.recipientid == 7
+    assert contact.lastmodified == datetime(2004, 6, 25, 15, 29)
+    assert contact.in_el is not None
+
+
+@pytest.mark.parametrize('value', [
+    '6/25/04 3:29 PM', '12/19/12 10:36 AM', '12/19/2012 12:05 AM', '1/2/2013 12:30 PM', '05/31/2011 12:43:21',
+    '05/31/2011', '3/24/98 11:16 pm', '2013-07-03T12:00:00', 'June 3, 2014',
+])
+def test_parse_engage_date_matches_dateutil(value):
+    assert parse_engage_date(value) == parse_datetime(value)
+
+
+@pytest.mark.parametrize('this_year', [2026, 2060, 2099])
+@pytest.mark.parametrize('offset', [-51, -50, -49, 48, 49, 50])
+def test_parse_engage_date_pivots_two_digit_years_like_dateutil(monkeypatch, this_year, offset):
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime(this_year, 6, 15)
+
+    monkeypatch.setattr(helpers, 'datetime', FrozenDatetime)
+    info = parserinfo()
+    info._year = this_year
+    info._century = this_year // 100 * 100
+
+    value = '1/2/%02d 3:04 PM' % ((this_year + offset) % 100)
+    # Bypasses the cache of parsed dates, which doesn't know about the frozen year
+    assert helpers._parse_engage_date(value) == parser(info).parse(value)
+
+
+def test_parse_engage_date_remembers_values():
+    first = parse_engage_date('7/4/14 1:15 PM')
+    assert parse_engage_date('7/4/14 1:15 PM') is first
+
+    with pytest.raises(TypeError):
+        parse_engage_date(None)
@@ -0,0 +1,73 @@
+import csv
+from datetime import date
+import pytest
+from xml.etree.ElementTree import fromstring
+from friendly.silverpop.engage.constants import IMPORT_ACTION_ADD_ONLY, COLUMN_TYPE_YESNO
+from friendly.silverpop.engage.imports import FileTransfer, LocalDirectoryTransfer, ListImport, format_value
+from friendly.silverpop.engage.resources import Column
+from friendly.silverpop.engage.jobs import Job
+from friendly.silverpop.engage.resources import Database
+from tests.conftest import FakeRequests, engage_response, engage_meta_data
+
+
+def test_import_list_uploads_source_and_mapping(offline_api, tmpdir):
+    offline_api._requests = FakeRequests(
+        engage_response('<SESSIONID>abc</SESSIONID>'),
+        engage_response(engage_meta_data(columns=('Email', 'First Name', 'Birthday'))),
+        engage_response('<JOB_ID>789</JOB_ID>'))
+
+    rows = ({'Email': 'user%d@example.com' % i, 'First Name': u'J\xf6hn', 'Birthday': date(1980, 1, i + 1)}
+            for i in range(3))
+    job = offline_api.import_list(1, rows, LocalDirectoryTransfer(str(tmpdir)), name='load')
+
+    assert isinstance(job, Job)
+    assert (job.id, job.source_file, job.map_file) == (789, 'load.csv', 'load.xml')
+    assert '<MAP_FILE>load.xml</MAP_FILE><SOURCE_FILE>load.csv</SOURCE_FILE>' in offline_api._requests.calls[-1]['data']
+
+    with open(str(tmpdir.join('load.csv')), 'rb') as f:
+        source = list(csv.reader(f))
+    assert source[0] == ['Birthday', 'Email', 'First Name']
+    assert source[1] == ['01/01/1980', 'user0@example.com', 'J\xc3\xb6hn']
+    assert len(source) == 4
+
+    mapping = fromstring(tmpdir.join('load.xml').read())
+    assert [el.tag for el in mapping] == ['LIST_INFO', 'SYNC_FIELDS', 'MAPPING']
+    assert mapping.findtext('LIST_INFO/ACTION') == 'ADD_AND_UPDATE'
+    assert mapping.findtext('LIST_INFO/LIST_ID') == '1'
+    assert [el.text for el in mapping.findall('SYNC_FIELDS/SYNC_FIELD/NAME')] == ['Email']
+    assert [(el.findtext('INDEX'), el.findtext('NAME')) for el in mapping.findall('MAPPING/COLUMN')] == [
+        ('1', 'Birthday'), ('2', 'Email'), ('3', 'First Name')]
+
+
+def test_import_rejects_unknown_columns(offline_api, tmpdir):
+    offline_api._requests = FakeRequests(
+        engage_response('<SESSIONID>abc</SESSIONID>'),
+        engage_response(engage_meta_data()))
+
+    database = Database()
+    database.id = 1
+    database.api = offline_api
+    list_import = ListImport(offline_api, database, LocalDirectoryTransfer(str(tmpdir)), action=IMPORT_ACTION_ADD_ONLY)
+
+    with pytest.raises(ValueError):
+        list_import.upload([{'Email': 'a@example.com', 'Shoe Size': 42}])
+
+    with pytest.raises(ValueError):
+        list_import.upload([{'email': 'a@example.com'}, {'email': 'b@example.com', 'first_name': 'B'}])
+
+    list_import.upload([{'email': 'a@example.com'}], columns=['email', 'first_name'])
+    assert list_import.count == 1
+    assert 'SYNC_FIELDS' not in tmpdir.join(list_import.map_file).read()
+    assert tmpdir.join(list_import.source_file).read() == 'Email,First Name\r\na@example.com,\r\n'
+
+
+def test_yes_no_values_keep_their_meaning():
+    column = Column('Opted In', COLUMN_TYPE_YESNO)
+    values = ['No', 'false', '0', ' N ', 'Yes', 'TRUE', '1', True, False, 0, 1, 'maybe']
+    assert [format_value(value, column) for value in values] == [
+        'No', 'No', 'No', 'No', 'Yes', 'Yes', 'Yes', 'Yes', 'No', 'No', 'Yes', 'maybe']
+
+
+def test_file_transfer_is_abstract():
+    with pytest.raises(TypeError):
+        FileTransfer()
@@ -0,0 +1,111 @@
+import time
+import pytest
+import requests
+from friendly.silverpop.engage.api import EngageApi
+from friendly.silverpop.engage.constants import EXPORT_TYPE_ALL, EXPORT_FORMAT_CSV, JOB_STATUS_COMPLETE
+from friendly.silverpop.engage.concurrency import TimeoutError
+from friendly.silverpop.engage.exceptions import EngageError, JobFailedError
+from friendly.silverpop.engage.jobs import Job, JobPoller
+from tests.conftest import FakeRequests, engage_response, engage_fault
+
+
+def job_status(job_id, status, description='Export'):
+    return engage_response('<JOB_ID>%d</JOB_ID><JOB_STATUS>%s</JOB_STATUS><JOB_DESCRIPTION>%s</JOB_DESCRIPTION>'
+                           % (job_id, status, description))
+
+
+@pytest.fixture
+def polling_api():
+    api = EngageApi('user', 'secret', 'https://api.example.com/XMLAPI', job_poll_interval=0.01,
+                    job_max_poll_interval=0.04)
+    yield api
+    api.close()
+
+
+def test_export_list_returns_a_job_which_can_be_waited_for(polling_api):
+    polling_api._requests = FakeRequests(
+        engage_response('<SESSIONID>abc</SESSIONID>'),
+        engage_response('<JOB_ID>42</JOB_ID><FILE_PATH>/download/export.csv</FILE_PATH>'),
+        job_status(42, 'WAITING'),
+        job_status(42, 'RUNNING'),
+        job_status(42, 'COMPLETE'))
+
+    job = polling_api.export_list(1, EXPORT_TYPE_ALL, EXPORT_FORMAT_CSV)
+    assert (job.id, job.file_path, job.status) == (42, '/download/export.csv', None)
+
+    assert job.done() is False
+    assert job.wait(timeout=5) is job
+    assert job.status == JOB_STATUS_COMPLETE
+    assert job.done() is True
+    assert len(polling_api._requests.calls) == 5
+    assert '<GetJobStatus><JOB_ID>42</JOB_ID></GetJobStatus>' in polling_api._requests.calls[-1]['data']
+
+
+def test_failed_jobs_raise_on_wait(polling_api):
+    polling_api._requests = FakeRequests(
+        engage_response('<SESSIONID>abc</SESSIONID>'),
+        job_status(7, 'ERROR', 'Invalid mapping file'),
+        engage_fault(50, 'Invalid job id'))
+
+    with pytest.raises(JobFailedError) as excinfo:
+        Job(polling_api, 7).wait(timeout=5)
+    assert 'Invalid mapping file' in str(excinfo.value)
+
+    future = Job(polling_api, 8).wait_async()
+    assert 'Invalid job id' in str(future.exception(timeout=5))
+
+
+def test_only_transport_errors_are_retried(polling_api):
+    def unreachable(url, data):
+        raise requests.ConnectionError('Connection reset')
+
+    polling_api._requests = FakeRequests(
+        engage_response('<SESSIONID>abc</SESSIONID>'),
+        unreachable,
+        job_status(7, 'COMPLETE'),
+        engage_response('<JOB_ID>8</JOB_ID>'))
+
+    assert Job(polling_api, 7).wait(timeout=5).status == JOB_STATUS_COMPLETE
+
+    with pytest.raises(EngageError):
+        Job(polling_api, 8).wait(timeout=5)
+    assert polling_api.job_poller._watched == {}
+
+
+def test_jobs_are_not_polled_after_all_waiters_timed_out(polling_api):
+    polling_api._requests = FakeRequests(engage_response('<SESSIONID>abc</SESSIONID>'),
+                                         *[job_status(7, 'RUNNING')] * 50)
+
+    job = Job(polling_api, 7)
+    with pytest.raises(TimeoutError):
+        job.wait(timeout=0.1)
+    assert polling_api.job_poller._watched == {}
+
+    time.sleep(0.1)
+    calls = len(polling_api._requests.calls)
+    time.sleep(0.2)
+    assert len(polling_api._requests.calls) == calls
+
+
+def test_jobs_share_one_polling_loop(polling_api):
+    statuses = {1: ['RUNNING', 'RUNNING', 'COMPLETE'], 2: ['COMPLETE']}
+
+    def respond(url, data):
+        job_id = 1 if '<JOB_ID>1<' in data else 2
+        return job_status(job_id, statuses[job_id].pop(0))
+
+    polling_api._requests = FakeRequests(engage_response('<SESSIONID>abc</SESSIONID>'), *[respond] * 4)
+
+    first, second = Job(polling_api, 1), Job(polling_api, 2)
+    futures = [first.wait_async(), second.wait_async(), first.wait_async()]
+    assert futures[0] is futures[2]
+    assert [future.result(timeout=5) for future in futures] == [first, second, first]
+    assert statuses == {1: [], 2: []}
+    assert first.api.job_poller is polling_api.job_poller
+
+
+def test_poll_delays_are_jittered():
+    poller = JobPoller(interval=1, max_interval=8, jitter=0.5)
+    delays = [poller.delay(1) for _ in range(100)]
+    assert all(0.5 <= delay <= 1 for delay in delays)
+    assert len(set(delays)) > 1
@@ -0,0 +1,123 @@
+import io
+import pytest
+from friendly.silverpop.engage.api import GET_LISTS_ENVELOPE
+from friendly.silverpop.engage.exceptions import EngageError
+from friendly.silverpop.engage.api import EngageApi
+from friendly.silverpop.engage.parsers import Fault, ResponseStream, StdlibParser, get_parser
+from friendly.silverpop.engage.resources import Database, ContactList, Query
+from tests.conftest import FakeRequests, engage_response, engage_fault, engage_list
+
+
+class TrackingSource(object):
+    """File-like object which remembers how many bytes have been read"""
+
+    def __init__(self, data):
+        self._source = io.BytesIO(data)
+        self.consumed = 0
+
+    def read(self, size=-1):
+        data = self._source.read(min(size, 64) if size > 0 else 64)
+        self.consumed += len(data)
+        return data
+
+
+def test_stream_knows_the_state_before_reading_the_results():
+    data = engage_response(''.join(engage_list(i, 'List %d' % i) for i in range(500)))
+    source = TrackingSource(data)
+
+    stream = ResponseStream(source)
+    assert stream.success is True
+    assert stream.error is None
+    assert source.consumed < len(data) / 10
+
+    ids = [int(el.findtext('ID')) for el in stream.iterfind('LIST')]
+    assert ids == list(range(500))
+    assert source.consumed == len(data)
+
+
+def test_stream_parses_faults():
+    stream = ResponseStream(io.BytesIO(engage_fault(128, 'Recipient is not a member of the list.')))
+
+    assert stream.success is False
+    assert stream.error == Fault('Client', 'Recipient is not a member of the list.', 128)
+    assert stream.error_id == 128
+    assert list(stream) == []
+
+
+def test_stream_yields_children_preceding_success():
+    stream = ResponseStream(io.BytesIO(
+        '<Envelope><Body><RESULT><JOB_ID>7</JOB_ID><SUCCESS>true</SUCCESS><FILE_PATH>a.csv</FILE_PATH>'
+        '</RESULT></Body></Envelope>'))
+
+    assert [el.tag for el in stream] == ['JOB_ID', 'FILE_PATH']
+
+
+def test_stream_requires_success():
+    with pytest.raises(EngageError):
+        ResponseStream(io.BytesIO('<Envelope><Body><RESULT/></Body></Envelope>'))
+
+
+def test_get_streams_responses(offline_api):
+    offline_api._requests = FakeRequests(
+        engage_response('<SESSIONID>abc</SESSIONID>'),
+        engage_response(engage_list(1, 'Test')),
+        engage_fault(128))
+
+    stream = offline_api.get(GET_LISTS_ENVELOPE.render('1', '0'), stream=True)
+    assert offline_api._requests.calls[-1]['stream'] is True
+    assert [el.findtext('NAME') for el in stream] == ['Test']
+
+    with pytest.raises(EngageError):
+        offline_api.get(GET_LISTS_ENVELOPE.render('1', '0'), stream=True)
+    assert offline_api.error.error_id == 128
+
+
+def test_iter_lists_hydrates_lists_one_by_one(offline_api):
+    offline_api._requests = FakeRequests(
+        engage_response('<SESSIONID>abc</SESSIONID>'),
+        engage_response(engage_list(1, 'Customers') + engage_list(2, 'Newsletter', list_type=18) +
+                        engage_list(3, 'Active', list_type=1)))
+
+    lists = offline_api.iter_lists(1, 0)
+    assert offline_api._requests.calls == []
+
+    database = next(lists)
+    assert isinstance(database, Database)
+    assert (database.id, database.name, database.api) == (1, 'Customers', offline_api)
+    assert database.in_el is None
+
+    assert [type(item) for item in lists] == [ContactList, Query]
+
+
+@pytest.mark.parametrize('parser', ['stdlib', 'lxml'])
+def test_parser_backends(parser):
+    if parser == 'lxml':
+        pytest.importorskip('lxml')
+
+    api = EngageApi('user', 'secret', 'https://api.example.com/XMLAPI', parser=parser)
+    assert api.parser.name == parser
+
+    api._requests = FakeRequests(
+        engage_response('<SESSIONID>abc</SESSIONID>'),
+        engage_response(engage_list(1, 'Customers') + engage_list(2, 'Newsletter', list_type=18)),
+        engage_fault(128, 'Invalid list', 'Client'),
+        engage_response(engage_list(1, 'Customers')))
+
+    assert [item.id for item in api.get_lists(1, 0)] == [1, 2]
+
+    result = api.get(GET_LISTS_ENVELOPE.render('1', '1'), raise_on_error=False)
+    assert (result.success, result.error) == (False, Fault('Client', 'Invalid list', 128))
+
+    stream = api.get(GET_LISTS_ENVELOPE.render('1', '0'), stream=True)
+    assert [el.findtext('NAME') for el in stream.iterfind('LIST')] == ['Customers']
+
+
+def test_auto_parser_falls_back_to_stdlib(monkeypatch):
+    from friendly.silverpop.engage import parsers
+    monkeypatch.setattr(parsers, 'lxml_etree', None)
+
+    assert isinstance(get_parser(), StdlibParser)
+    with pytest.raises(ImportError):
+        get_parser('lxml')
+    with pytest.raises(ValueError):
+        get_parser('sax')
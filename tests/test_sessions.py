@@ -0,0 +1,249 @@
+import itertools
+import threading
+import pytest
+from friendly.silverpop.engage.api import EngageApi
+from friendly.silverpop.engage.constants import SESSION_TIMEOUT
+from friendly.silverpop.engage.resources import Session
+from friendly.silverpop.engage.exceptions import EngageError, SessionIsExpiredOrInvalidError
+from friendly.silverpop.engage.sessions import SessionPool
+from tests.conftest import FakeRequests, engage_response, engage_fault
+
+
+class FakeApi(object):
+    def __init__(self):
+        self.ids = itertools.count(1)
+        self.closed = []
+
+    def create_session(self):
+        return 'session-%d' % next(self.ids)
+
+    def close_session(self, session):
+        self.closed.append(session)
+
+
+def test_pool_logs_in_lazily_up_to_its_size():
+    api = FakeApi()
+    pool = SessionPool(api, 2)
+    assert len(pool) == 0
+
+    first = pool.acquire()
+    second = pool.acquire()
+    assert first != second
+    assert len(pool) == 2
+
+    with pytest.raises(EngageError):
+        pool.acquire(timeout=0.01)
+
+    pool.release(first)
+    assert pool.acquire() == first
+
+
+def test_pool_waits_for_released_sessions():
+    pool = SessionPool(FakeApi(), 1)
+    session = pool.acquire()
+
+    threading.Timer(0.05, pool.release, (session, )).start()
+    assert pool.acquire(timeout=1) == session
+
+
+def test_pool_replaces_discarded_sessions_and_logs_out_on_close():
+    api = FakeApi()
+    pool = SessionPool(api, 1)
+
+    with pool.lease() as session:
+        pool.discard(session)
+    assert len(pool) == 0
+
+    with pool.lease() as session:
+        assert session == 'session-2'
+
+    pool.prefill()
+    pool.close()
+    assert api.closed == ['session-2']
+
+    with pytest.raises(EngageError):
+        pool.acquire()
+
+
+def test_api_spreads_requests_over_pooled_sessions():
+    api = EngageApi('user', 'secret', 'https://api.example.com/XMLAPI', session_pool_size=2)
+    sessions = itertools.count(1)
+
+    def respond(url, data):
+        if '<Login>' in data:
+            return engage_response('<SESSIONID>s%d</SESSIONID>' % next(sessions))
+        if url.endswith(';jsessionid=s1') and '<RemoveRecipient>' in data:
+            return engage_fault(145, 'Session expired')
+        return engage_response()
+
+    api._requests = FakeRequests(*([respond] * 10))
+
+    # Lease both sessions at the same time
+    first = api.session_pool.acquire()
+    second = api.session_pool.acquire()
+    api.session_pool.release(first)
+    api.session_pool.release(second)
+
+    # The expired session is dropped and the request replayed with the other one
+    assert api.remove_recipient(1, 'a@example.com')
+    assert len(api.session_pool) == 1
+    assert api._requests.calls[-2]['url'].endswith(';jsessionid=s1')
+    assert api._requests.calls[-1]['url'].endswith(';jsessionid=s2')
+    assert api.session is None
+
+    api.close()
+    assert api._requests.calls[-1]['url'].endswith(';jsessionid=s2')
+    assert '<Logout/>' in api._requests.calls[-1]['data']
+
+
+def expiring_engage(expired_ids):
+    """Answers logins with increasing session ids and requests of expired sessions with fault 145"""
+    sessions = itertools.count(1)
+
+    def respond(url, data):
+        if '<Login>' in data:
+            return engage_response('<SESSIONID>s%d</SESSIONID>' % next(sessions))
+        if url.rsplit('=', 1)[-1] in expired_ids:
+            return engage_fault(145, 'Session expired')
+        return engage_response()
+
+    return respond
+
+
+def test_expired_session_is_renewed_and_request_replayed(offline_api):
+    offline_api._requests = FakeRequests(*([expiring_engage(['s1'])] * 4))
+
+    assert offline_api.remove_recipient(1, 'a@example.com')
+    assert offline_api.session.id == 's2'
+
+    urls = [call['url'].rsplit('=', 1)[-1] for call in offline_api._requests.calls]
+    assert urls == ['https://api.example.com/XMLAPI', 's1', 'https://api.example.com/XMLAPI', 's2']
+
+
+def test_replays_are_bounded(offline_api):
+    offline_api._requests = FakeRequests(*([expiring_engage(['s1', 's2', 's3'])] * 6))
+
+    with pytest.raises(SessionIsExpiredOrInvalidError):
+        offline_api.remove_recipient(1, 'a@example.com')
+    assert len(offline_api._requests.calls) == 4
+    assert offline_api.session.id == 's2'
+
+
+def test_streamed_requests_are_not_replayed(offline_api):
+    offline_api._requests = FakeRequests(*([expiring_engage(['s1'])] * 4))
+
+    with pytest.raises(SessionIsExpiredOrInvalidError):
+        offline_api.insert_update_table(1, iter([{'id': '1'}]))
+    assert len(offline_api._requests.calls) == 2
+
+
+def test_rows_given_as_list_are_replayed(offline_api):
+    offline_api._requests = FakeRequests(*([expiring_engage(['s1'])] * 4))
+
+    assert offline_api.insert_update_table(1, [{'id': '1'}])
+    assert offline_api.session.id == 's2'
+    assert len(offline_api._requests.calls) == 4
+
+
+def test_concurrent_expiries_log_in_once(offline_api):
+    offline_api._requests = FakeRequests(*([expiring_engage(['s1'])] * 20))
+    offline_api.login()
+
+    threads = [threading.Thread(target=offline_api.remove_recipient, args=(1, 'a@example.com'))
+               for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    logins = [call for call in offline_api._requests.calls if '<Login>' in call['data']]
+    assert len(logins) == 2
+    assert offline_api.session.id == 's2'
+
+
+def test_session_tracks_age_and_idle_time():
+    session = Session('abc')
+    session.created_at -= 100
+    session.last_used_at -= 50
+
+    assert session.age >= 100
+    assert 50 <= session.idle_time < 51
+    assert session.expires_in(60) <= 10
+
+    session.touch()
+    assert session.idle_time < 1
+    assert session.expires_in(60) > 59
+
+
+def test_idle_expired_session_is_renewed_before_use(offline_api):
+    offline_api._requests = FakeRequests(*([expiring_engage(['s1'])] * 4))
+    offline_api.login()
+    offline_api.session.last_used_at -= SESSION_TIMEOUT
+
+    assert offline_api.remove_recipient(1, 'a@example.com')
+
+    # No request was wasted on the expired session
+    assert [call['url'].rsplit('=', 1)[-1] for call in offline_api._requests.calls][1:] == \
+        ['https://api.example.com/XMLAPI', 's2']
+
+
+def test_ensure_session_refreshes_sessions_about_to_expire(offline_api):
+    offline_api._requests = FakeRequests(*([expiring_engage([])] * 4))
+    renewals = []
+    offline_api.add_session_listener(lambda old, new: renewals.append((old.id, new.id)))
+
+    session = offline_api.ensure_session()
+    assert session.id == 's1'
+    assert offline_api.ensure_session() is session
+
+    session.last_used_at -= SESSION_TIMEOUT - 10
+    assert offline_api.ensure_session().id == 's2'
+    assert renewals == [('s1', 's2')]
+
+    # The replaced session has been logged out
+    assert '<Logout/>' in offline_api._requests.calls[-1]['data']
+    assert offline_api._requests.calls[-1]['url'].endswith('=s1')
+
+
+def test_pool_refreshes_and_drops_stale_sessions():
+    api = FakeApi()
+    api.create_session = lambda: Session('session-%d' % next(api.ids))
+    pool = SessionPool(api, 2, max_idle=60)
+
+    pool.prefill()
+    first, second = pool._idle
+    first.last_used_at -= 55
+
+    pool.refresh(lambda session: session.expires_in(60) <= 10)
+    assert api.closed == [first]
+    assert [session.id for session in pool._idle] == ['session-2', 'session-3']
+
+    second.last_used_at -= 60
+    assert pool.acquire().id == 'session-3'
+    assert len(pool) == 1
+
+
+def test_keepalive_refreshes_sessions_in_the_background(offline_api):
+    offline_api._requests = FakeRequests(*([expiring_engage([])] * 4))
+    offline_api.login()
+    offline_api.session.last_used_at -= SESSION_TIMEOUT
+
+    refreshed = threading.Event()
+    offline_api.add_session_listener(lambda old, new: refreshed.set())
+    offline_api.start_keepalive(interval=0.01)
+    try:
+        assert refreshed.wait(1)
+        assert offline_api.session.id == 's2'
+    finally:
+        offline_api.close()
+
+
+def test_keepalive_is_started_by_the_constructor():
+    api = EngageApi('user', 'secret', 'https://api.example.com/XMLAPI', keepalive=True)
+    try:
+        assert api._keeper is not None
+        assert api._keeper.is_alive()
+        assert api._engage_url == 'https://api.example.com/XMLAPI'
+    finally:
+        api.close()
+    assert api._keeper is None
@@ -0,0 +1,127 @@
+import time
+from xml.etree.ElementTree import fromstring
+from friendly.silverpop.engage.api import EngageApi
+from friendly.silverpop.engage.catalog import ListCatalog
+from friendly.silverpop.engage.resources import Database
+from friendly.silverpop.engage.store import SQLiteStore
+from tests.conftest import FakeRequests, engage_response, engage_list, engage_meta_data
+
+
+def make_api(store, *responses):
+    api = EngageApi('user', 'secret', 'https://api.example.com/XMLAPI', catalog_ttl=60, meta_data_ttl=300, store=store)
+    api._requests = FakeRequests(*responses)
+    return api
+
+
+def test_catalog_survives_serialization():
+    catalog = ListCatalog.from_elements([fromstring(engage_list(1, 'Customers', size=3)),
+                                         fromstring(engage_list(2, u'Caf\xe9').encode('utf-8')),
+                                         fromstring(engage_list(1, 'Clients'))])
+
+    restored = ListCatalog.from_dict(catalog.to_dict())
+    assert [item.id for item in restored] == [2, 1]
+    assert restored.find('Clients').size == 0
+    assert restored[2].name == u'Caf\xe9'
+    assert restored[1].last_modified == catalog[1].last_modified
+
+
+def test_new_processes_start_from_the_store(tmpdir):
+    path = str(tmpdir.join('engage.db'))
+
+    api = make_api(SQLiteStore(path),
+                   engage_response('<SESSIONID>abc</SESSIONID>'),
+                   engage_response(engage_list(1, 'Customers')),
+                   engage_response(engage_meta_data()))
+    database, = api.get_databases(1)
+    assert database.get_meta_data()
+
+    # A new worker doesn't need any round trip for the catalog and the schema
+    worker = make_api(SQLiteStore(path))
+    database, = worker.get_databases(1)
+    assert isinstance(database, Database)
+    assert database.name == 'Customers'
+    assert database.get_meta_data()
+    assert database._table.has_column('First Name')
+    assert worker._requests.calls == []
+    worker.catalog_cache.close()
+
+
+def test_invalidated_meta_data_is_deleted_from_the_store():
+    store = SQLiteStore(':memory:')
+    store.save_meta_data(1, '<RESULT/>')
+    store.save_catalog(1, 0, {})
+
+    api = make_api(store)
+    api.invalidate_meta_data(1)
+    api.catalog_cache.invalidate()
+
+    assert store.load_meta_data(1) is None
+    assert store.load_catalog(1, 0) is None
+
+
+def test_store_ignores_entries_older_than_max_age():
+    store = SQLiteStore(':memory:', max_age=60)
+    store.save_meta_data(1, '<RESULT/>', fetched_at=1)
+    store.save_meta_data(2, '<RESULT/>')
+
+    assert store.load_meta_data(1) is None
+    assert store.load_meta_data(2)[0] == '<RESULT/>'
+
+
+def test_unreadable_entries_are_discarded_and_fetched_again():
+    store = SQLiteStore(':memory:')
+    store.save_catalog(1, 0, {'ids': [1]})  # Written by an older version
+    store.save_meta_data(1, '<RESULT><COLUMNS>')
+
+    api = make_api(store,
+                   engage_response('<SESSIONID>abc</SESSIONID>'),
+                   engage_response(engage_list(1, 'Customers')),
+                   engage_response(engage_meta_data()))
+    database, = api.get_databases(1)
+    assert database.name == 'Customers'
+    assert database.get_meta_data()
+    assert database._table.has_column('First Name')
+    assert len(api._requests.calls) == 3
+
+    assert store.load_catalog(1, 0)[0]['names'] == ['Customers']
+    assert 'First Name' in store.load_meta_data(1)[0]
+    api.catalog_cache.close()
+
+
+def test_stored_meta_data_keeps_its_age():
+    store = SQLiteStore(':memory:')
+    store.save_meta_data(1, '<RESULT>%s</RESULT>' % engage_meta_data(), fetched_at=time.time() - 400)
+    store.save_meta_data(2, '<RESULT>%s</RESULT>' % engage_meta_data(columns=('Email', 'Age')),
+                        fetched_at=time.time() - 250)
+
+    api = make_api(store,
+                   engage_response('<SESSIONID>abc</SESSIONID>'),
+                   engage_response(engage_meta_data(columns=('Email', 'Last Name'))))
+    database = Database()
+    database.id = 1
+    assert api.get_list_meta_data(database)
+    assert database._table.has_column('Last Name')  # Older than meta_data_ttl, fetched again
+    assert len(api._requests.calls) == 2
+
+    database.id = 2
+    assert api.get_list_meta_data(database)
+    assert database._table.has_column('Age')
+    assert len(api._requests.calls) == 2
+
+    # Expires after the remaining 50 seconds
+    (data, expires_at) = api.meta_data_cache._data['2']
+    assert abs(expires_at - (time.time() + 50)) < 5
+    api.catalog_cache.close()
+
+
+def test_catalogs_are_invalidated_by_visibility():
+    store = SQLiteStore(':memory:')
+    for visibility, list_type in [(0, 0), (0, 1), (1, 0)]:
+        store.save_catalog(visibility, list_type, {})
+
+    store.delete_catalog(0, None)
+    assert (store.load_catalog(0, 0), store.load_catalog(0, 1)) == (None, None)
+    assert store.load_catalog(1, 0) is not None
+
+    store.delete_catalog(None, 0)
+    assert store.load_catalog(1, 0) is None
@@ -0,0 +1,103 @@
+import threading
+import time
+import zlib
+import pytest
+from friendly.silverpop.engage.api import EngageApi, Fault, Result, LOGIN_ENVELOPE, LOGOUT_ENVELOPE
+from friendly.silverpop.engage.constants import LIST_VISIBILITY_SHARED
+from tests.conftest import FakeRequests, engage_response, engage_fault
+
+
+def test_adapter_is_mounted_with_pool_settings():
+    api = EngageApi('user', 'secret', 'https://api.example.com/XMLAPI', pool_connections=2, pool_maxsize=32)
+
+    adapter = api._requests.get_adapter('https://api.example.com/XMLAPI')
+    assert adapter._pool_connections == 2
+    assert adapter._pool_maxsize == 32
+
+
+def test_requests_are_posted_with_timeouts():
+    offline_api = EngageApi('user', 'secret', 'https://api.example.com/XMLAPI', timeout=(3.05, 60))
+    offline_api._requests = FakeRequests(
+        engage_response('<SESSIONID>abc</SESSIONID>'),
+        engage_response(),
+        engage_response())
+
+    offline_api.get_databases(LIST_VISIBILITY_SHARED)
+    login, get_lists = offline_api._requests.calls
+    assert login['timeout'] == (3.05, 60)
+    assert get_lists['url'] == 'https://api.example.com/XMLAPI;jsessionid=abc'
+    assert '<GetLists>' in get_lists['data']
+
+    offline_api.logout()
+    assert offline_api._requests.calls[-1]['timeout'] == (3.05, 60)
+
+
+def test_per_call_timeout_overrides_default(offline_api):
+    offline_api._requests = FakeRequests(engage_response())
+
+    offline_api.get(LOGOUT_ENVELOPE.render(), session_required=False, timeout=5)
+    assert offline_api._requests.calls[0]['timeout'] == 5
+
+
+def test_request_bodies_are_gzipped():
+    offline_api = EngageApi('user', 'secret', 'https://api.example.com/XMLAPI', compress_requests=True)
+    offline_api._requests = FakeRequests(engage_response('<SESSIONID>abc</SESSIONID>'))
+
+    assert offline_api.login()
+
+    call = offline_api._requests.calls[0]
+    assert call['headers']['Content-Encoding'] == 'gzip'
+    body = zlib.decompress(call['data'], 16 + zlib.MAX_WBITS)
+    assert body.endswith('<Login><USERNAME>user</USERNAME><PASSWORD>secret</PASSWORD></Login></Body></Envelope>')
+
+
+def test_get_returns_immutable_results(offline_api):
+    offline_api._requests = FakeRequests(
+        engage_response('<SESSIONID>abc</SESSIONID>'),
+        engage_fault(128, 'Recipient is not a member of the list.'))
+
+    result = offline_api.get(LOGIN_ENVELOPE.render('user', 'secret'), session_required=False)
+    assert isinstance(result, Result)
+    assert result.success is True
+    assert result.error is None and result.fault_code is None
+
+    (success, tree, error) = offline_api.get(LOGOUT_ENVELOPE.render(), session_required=False, raise_on_error=False)
+    assert success is False
+    assert error == Fault('Client', 'Recipient is not a member of the list.', 128)
+    assert offline_api.error == error
+
+    with pytest.raises(AttributeError):
+        result.success = False
+
+
+def test_error_is_tracked_per_thread(offline_api):
+    offline_api._requests = FakeRequests(engage_fault(128))
+    offline_api.get(LOGOUT_ENVELOPE.render(), session_required=False, raise_on_error=False)
+    assert offline_api.error.error_id == 128
+
+    seen = []
+    thread = threading.Thread(target=lambda: seen.append(offline_api.error))
+    thread.start()
+    thread.join()
+    assert seen == [None]
+
+
+def test_concurrent_calls_log_in_once(offline_api):
+    def respond(url, data):
+        if '<Login>' in data:
+            time.sleep(0.05)
+            return engage_response('<SESSIONID>abc</SESSIONID>')
+        return engage_response()
+
+    offline_api._requests = FakeRequests(*([respond] * 9))
+
+    threads = [threading.Thread(target=offline_api.remove_recipient, args=(1, 'a@example.com'))
+               for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    logins = [call for call in offline_api._requests.calls if '<Login>' in call['data']]
+    assert len(logins) == 1
+    assert len(offline_api._requests.calls) == 9